@@ -12,18 +12,24 @@ from src.database import db_service  # noqa: E402
 
 async def check_duplicates():
     print("Connecting to DB...")
-    await db_service.connect()
-    async with db_service.pool.acquire() as conn:
+    # Two concurrent queries below: a 2-connection pool is enough
+    await db_service.connect(min_size=1, max_size=2)
+    try:
         print("Checking for duplicate chunks (same source + chunk_index)...")
-        duplicates = await conn.fetch("""
-            SELECT
-                metadata->>'source' as source,
-                metadata->>'chunk_index' as chunk_index,
-                COUNT(*) as count
-            FROM documents
-            GROUP BY 1, 2
-            HAVING COUNT(*) > 1
-        """)
+        # Both queries are independent: run them on two pool connections at once.
+        # source/chunk_index are generated columns covered by documents_source_chunk_idx,
+        # so they run as index-only scans instead of reading every JSONB document
+        duplicates, files = await asyncio.gather(
+            db_service.pool.fetch("""
+                SELECT source, chunk_index, COUNT(*) as count
+                FROM documents
+                GROUP BY source, chunk_index
+                HAVING COUNT(*) > 1
+            """),
+            db_service.pool.fetch("""
+                SELECT DISTINCT source FROM documents ORDER BY source
+            """),
+        )
 
         if duplicates:
             print(f"❌ Found {len(duplicates)} duplicate chunks!")
@@ -34,10 +40,9 @@ async def check_duplicates():
 
         print("\nChecking for file duplication (files appearing multiple times)...")
         # This is harder to define without a 'ingestion_id', but we can check total files
-        files = await conn.fetch("""
-            SELECT DISTINCT metadata->>'source' as source FROM documents ORDER BY source
-        """)
         print(f"ℹ️ Total unique files in knowledge base: {len(files)}")
+    finally:
+        await db_service.close()
 
 
 if __name__ == "__main__":
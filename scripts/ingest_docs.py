@@ -1,9 +1,18 @@
 import argparse
 import asyncio
+import functools
 import logging
+import multiprocessing
+import os
 import re
 import sys
+import unicodedata
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Sized
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, chain, islice
 from pathlib import Path
+from typing import NamedTuple
 
 import tiktoken
 
@@ -14,6 +23,11 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None  # type: ignore
+
 try:
     from bs4 import BeautifulSoup
 except ImportError:
@@ -24,6 +38,11 @@ try:
 except ImportError:
     Document = None  # type: ignore
 
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None  # type: ignore
+
 try:
     from pypdf import PdfReader
 except ImportError:
@@ -57,6 +76,49 @@ LEGAL_AUTHORITIES = [
 ]
 
 
+# Order matters: specific -> general (first pattern in the list wins)
+# Word boundaries avoid matching inside other words
+LEGAL_TYPE_PATTERNS = [
+    (r"\bsumulas?\b", "Súmula"),
+    (r"\blei complementar\b", "Lei Complementar"),
+    (r"\blc\b", "Lei Complementar"),
+    (r"\bdecreto\s*lei\b", "Decreto-Lei"),
+    (r"\bdl\b", "Decreto-Lei"),
+    (r"\bdecreto\b", "Decreto"),
+    (r"\bdec\b", "Decreto"),
+    (r"\bportarias?\b", "Portaria"),
+    (r"\bresolu[cç][aã]o\b", "Resolução"),
+    (r"\bleis?\b", "Lei"),
+]
+
+
+def _priority_alternation(patterns: list[str]) -> re.Pattern:
+    # One capturing group per alternative inside a lookahead: matches are zero-width,
+    # so overlapping candidates are all visited and lastindex tells which one matched.
+    return re.compile("(?=" + "|".join(f"({p})" for p in patterns) + ")")
+
+
+_TYPE_RE = _priority_alternation([pattern for pattern, _ in LEGAL_TYPE_PATTERNS])
+_WORD_RE = re.compile(r"\w+")
+_COMBINING_MARKS_RE = re.compile(r"[\u0300-\u036f]")
+_NAME_SEPARATORS_RE = re.compile(r"[_\-.]")
+_YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+_NUMBER_KEYWORD_RE = re.compile(r"(?:n[º°o]|num|numero|lei|dec|decreto|lc|dl|portaria)\s*(\d+)")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _first_by_priority(pattern: re.Pattern, text: str) -> int | None:
+    """Index of the earliest-listed alternative that matches anywhere in text."""
+    best = None
+    for match in pattern.finditer(text):
+        index = match.lastindex - 1
+        if best is None or index < best:
+            best = index
+            if best == 0:
+                break
+    return best
+
+
 def extract_legal_metadata(filename: str) -> dict:
     """
     Extracts legal metadata (Type, Number, Year, Authority) from filename.
@@ -68,41 +130,25 @@ def extract_legal_metadata(filename: str) -> dict:
     meta = {}
     clean_name = filename.lower()
 
-    # Normalize simplified
-    # (In a production env, we'd use unicodedata to remove accents, but simple replacement works for now)
+    # Normalize: strip accents (NFKD + drop combining marks)
     # Also replace separators with spaces to handle LC_73, Lei-8666, dec.123 correctly with word boundaries
-    norm_name = clean_name.replace("ú", "u").replace("ç", "c").replace("ã", "a").replace("õ", "o")
-    norm_name = norm_name.replace("_", " ").replace("-", " ").replace(".", " ")
+    norm_name = _COMBINING_MARKS_RE.sub("", unicodedata.normalize("NFKD", clean_name))
+    norm_name = _NAME_SEPARATORS_RE.sub(" ", norm_name)
 
     # 1. Detect Type (Order matters: specific -> general)
-    # Using regex with word boundaries avoids matching inside other words
-    patterns = [
-        (r"\bsumulas?\b", "Súmula"),
-        (r"\blei complementar\b", "Lei Complementar"),
-        (r"\blc\b", "Lei Complementar"),
-        (r"\bdecreto\s*lei\b", "Decreto-Lei"),
-        (r"\bdl\b", "Decreto-Lei"),
-        (r"\bdecreto\b", "Decreto"),
-        (r"\bdec\b", "Decreto"),
-        (r"\bportarias?\b", "Portaria"),
-        (r"\bresolu[cç][aã]o\b", "Resolução"),
-        (r"\bleis?\b", "Lei"),
-    ]
-
-    for pattern, type_name in patterns:
-        if re.search(pattern, norm_name):
-            meta["type"] = type_name
-            break
+    type_index = _first_by_priority(_TYPE_RE, norm_name)
+    if type_index is not None:
+        meta["type"] = LEGAL_TYPE_PATTERNS[type_index][1]
 
     # 2. Detect Authority (Orgão)
-    for auth in LEGAL_AUTHORITIES:
-        # \b ensures we match "stf" but not "costfire"
-        if re.search(r"\b" + re.escape(auth) + r"\b", norm_name):
-            meta["authority"] = auth.upper()
-            break
+    # Whole-word lookup: matches "stf" but not "costfire"
+    words = set(_WORD_RE.findall(norm_name))
+    authority = next((auth for auth in LEGAL_AUTHORITIES if auth in words), None)
+    if authority is not None:
+        meta["authority"] = authority.upper()
 
     # 3. Detect Year (19xx or 20xx)
-    year_match = re.search(r"\b(19|20)\d{2}\b", clean_name)
+    year_match = _YEAR_RE.search(clean_name)
     if year_match:
         meta["year"] = int(year_match.group())
 
@@ -111,8 +157,7 @@ def extract_legal_metadata(filename: str) -> dict:
     # Look for digits that are NOT the captured year
 
     # Prioritized search near keywords
-    number_keywords = r"(?:n[º°o]|num|numero|lei|dec|decreto|lc|dl|portaria)\s*(\d+)"
-    keyword_match = re.search(number_keywords, norm_name)
+    keyword_match = _NUMBER_KEYWORD_RE.search(norm_name)
 
     candidate_number = None
     if keyword_match:
@@ -121,7 +166,7 @@ def extract_legal_metadata(filename: str) -> dict:
     # Fallback: find any digit sequence
     if not candidate_number:
         # Find all digit sequences
-        all_numbers = re.findall(r"\d+", clean_name)
+        all_numbers = _DIGITS_RE.findall(clean_name)
         for num in all_numbers:
             # Skip if it matches the year we already found
             if meta.get("year") and str(meta["year"]) == num:
@@ -141,47 +186,72 @@ def extract_legal_metadata(filename: str) -> dict:
     return meta
 
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
+# Pages with less text than this that carry images are treated as scanned (image-only)
+MIN_PAGE_TEXT_CHARS = 20
+
+
+def extract_text_from_pdf(pdf_path: Path) -> Iterator[str]:
+    """Yield PDF text page by page, using PyMuPDF and falling back to pypdf."""
+    if pymupdf:
+        image_only = 0
+        with pymupdf.open(pdf_path) as doc:
+            for page in doc:
+                text = page.get_text("text")
+                stripped = text.strip()
+                # Páginas digitalizadas (só imagem) não têm texto útil: pula sem processar
+                if len(stripped) < MIN_PAGE_TEXT_CHARS and page.get_images():
+                    image_only += 1
+                    continue
+                if stripped:
+                    yield text
+
+        if image_only:
+            logger.warning(
+                "  🖼️ Skipped %d image-only page(s) in %s (OCR not supported)",
+                image_only,
+                pdf_path.name,
+            )
+        return
+
     if not PdfReader:
-        logger.error("pypdf not installed. Cannot read PDF files.")
-        sys.exit(1)
+        # ImportError, not SystemExit: in a pool worker it fails this file only
+        raise ImportError("Neither pymupdf nor pypdf installed. Cannot read PDF files.")
 
     reader = PdfReader(pdf_path)
-    text = ""
     for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+        yield page.extract_text() or ""
 
 
-def extract_text_from_docx(docx_path: Path) -> str:
-    """Extract text from DOCX including paragraphs and tables."""
+def extract_text_from_docx(docx_path: Path) -> Iterator[str]:
+    """Yield DOCX text: each paragraph, then each table row."""
     if not Document:
-        logger.error("python-docx not installed. Cannot read DOCX files.")
-        sys.exit(1)
+        raise ImportError("python-docx not installed. Cannot read DOCX files.")
 
     doc = Document(docx_path)
-    text_parts = []
 
     # Extract paragraphs
     for paragraph in doc.paragraphs:
         if paragraph.text.strip():
-            text_parts.append(paragraph.text)
+            yield paragraph.text
 
     # Extract tables (per python-docx best practices from Context7)
     for table in doc.tables:
         for row in table.rows:
             row_text = [cell.text.strip() for cell in row.cells if cell.text.strip()]
             if row_text:
-                text_parts.append(" | ".join(row_text))
+                yield " | ".join(row_text)
 
-    return "\n".join(text_parts)
 
+def _html_text_lxml(html_path: Path) -> str:
+    # libxml2 (C) parser; same visible text as BeautifulSoup's get_text()
+    with open(html_path, encoding="utf-8") as f:
+        root = lxml_html.fromstring(f.read())
+    for element in root.xpath("//script | //style"):
+        element.drop_tree()
+    return root.text_content()
 
-def extract_text_from_html(html_path: Path) -> str:
-    if not BeautifulSoup:
-        logger.error("beautifulsoup4 not installed. Cannot read HTML files.")
-        sys.exit(1)
 
+def _html_text_bs4(html_path: Path) -> str:
     with open(html_path, encoding="utf-8") as f:
         soup = BeautifulSoup(f, "html.parser")
 
@@ -189,18 +259,103 @@ def extract_text_from_html(html_path: Path) -> str:
     for script in soup(["script", "style"]):
         script.extract()
 
-    # Get text
-    text = soup.get_text()
+    return soup.get_text()
+
+
+def extract_text_from_html(html_path: Path) -> Iterator[str]:
+    """Yield the visible text blocks of an HTML file."""
+    if lxml_html is not None:
+        text = _html_text_lxml(html_path)
+    elif BeautifulSoup:
+        text = _html_text_bs4(html_path)
+    else:
+        raise ImportError("lxml/beautifulsoup4 not installed. Cannot read HTML files.")
 
     # Clean up whitespace
     lines = (line.strip() for line in text.splitlines())
     chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    text = "\n".join(chunk for chunk in chunks if chunk)
+    yield from (chunk for chunk in chunks if chunk)
+
 
-    return text
+def extract_text_from_txt(txt_path: Path) -> Iterator[str]:
+    """Yield a plain-text file line by line."""
+    with open(txt_path, encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+_NON_SPACE_RE = re.compile(r"\S")
+_ENCODE_SEGMENT_CHARS = 65_536
+_STREAM_WINDOW_CHARS = 262_144
+_UTF8_CONTINUATION = bytes(1 if 0x80 <= b < 0xC0 else 0 for b in range(256))
+
+
+@functools.lru_cache(maxsize=8)
+def _get_encoder(model_name: str) -> tiktoken.Encoding:
+    """Load the tiktoken encoder once per model (BPE tables are expensive to build)."""
+    return tiktoken.encoding_for_model(model_name)
+
+
+def _iter_segments(text: str, size: int):
+    """Yield consecutive slices of ~size chars, cut right after a run of newlines.
+
+    O pré-tokenizador do tiktoken fecha os tokens ao fim de uma sequência de quebras
+    de linha, então encodar os segmentos separadamente produz os mesmos tokens que
+    encodar o texto inteiro.
+    """
+    pos = 0
+    length = len(text)
+    while pos < length:
+        cut = pos + size
+        if cut < length:
+            newline = text.rfind("\n", pos, cut)
+            if newline > pos:
+                cut = newline + 1
+                while cut < length and text[cut] == "\n":
+                    cut += 1
+        yield text[pos:cut]
+        pos = cut
+
+
+class _TokenByteSizes(dict):
+    """token id -> byte length, filled lazily from the encoder vocabulary."""
+
+    def __init__(self, encoder: tiktoken.Encoding):
+        super().__init__()
+        self.encoder = encoder
+
+    def __missing__(self, token: int) -> int:
+        size = self[token] = len(self.encoder.decode_single_token_bytes(token))
+        return size
+
+
+@functools.lru_cache(maxsize=8)
+def _get_token_sizes(model_name: str) -> _TokenByteSizes:
+    return _TokenByteSizes(_get_encoder(model_name))
+
+
+class Split(NamedTuple):
+    """Char span text[start:end] plus the tokens starting inside it (token_start:token_end)."""
+
+    start: int
+    end: int
+    token_start: int
+    token_end: int
+
+    @property
+    def token_len(self) -> int:
+        return self.token_end - self.token_start
 
 
 class RecursiveTokenSplitter:
+    """Recursive separator-based splitter measured in tokens.
+
+    O documento é tokenizado uma única vez; cada trecho é um `Split` que carrega
+    o span de caracteres e o intervalo de tokens correspondente, calculado uma vez
+    por busca binária nos offsets dos tokens. A recursão e o merge reutilizam esse
+    intervalo em vez de recontar (ou re-encodar) substrings.
+    """
+
     def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50, model_name: str = "gpt-4o"):
         if chunk_overlap < 0:
             raise ValueError("chunk_overlap must be >= 0")
@@ -211,13 +366,110 @@ class RecursiveTokenSplitter:
 
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.tokenizer = tiktoken.encoding_for_model(model_name)
+        self.tokenizer = _get_encoder(model_name)
+        self._token_sizes = _get_token_sizes(model_name)
         self.separators = ["\n\n", "\n", ".", " ", ""]
 
     def split_text(self, text: str) -> list[str]:
-        return self._split_text_recursive(text, self.separators)
+        return list(self.split_stream([text]))
+
+    def split_stream(self, segments: Iterable[str]) -> Iterator[str]:
+        """Split text arriving in segments (pages, paragraphs, lines) with bounded memory.
+
+        Os segmentos são unidos por quebras de linha; enquanto restarem ao menos
+        _STREAM_WINDOW_CHARS caracteres, uma janela é dividida e o seu último chunk
+        (possivelmente incompleto) volta para o buffer. Onde cada janela termina
+        depende só do texto, não de quando os segmentos chegam, então o resultado é
+        igual ao de split_text sobre o texto unido.
+        """
+        buffer: list[str] = []
+        buffered = 0
+
+        for segment in segments:
+            buffer.append(segment)
+            buffered += len(segment) + 1
+            if buffered < _STREAM_WINDOW_CHARS:
+                continue
 
-    def _split_text_recursive(self, text: str, separators: list[str]) -> list[str]:
+            text = "\n".join(buffer)
+            pos = 0
+            while len(text) - pos >= _STREAM_WINDOW_CHARS:
+                chunks, pos = self._split_window(text, pos)
+                yield from chunks
+
+            # Kept even when empty: it carries the line break before the next segment
+            tail = text[pos:]
+            buffer = [tail]
+            buffered = len(tail)
+
+        if buffer:
+            text = "\n".join(buffer)
+            for span in self._split_document(text):
+                if chunk := text[span.start : span.end].strip():
+                    yield chunk
+
+    def _split_window(self, text: str, pos: int) -> tuple[list[str], int]:
+        """Chunks of the window starting at text[pos], but its last; returns where that one starts.
+
+        The window ends at the last line break of its second half (see _iter_segments), or
+        after _STREAM_WINDOW_CHARS characters in text without line breaks.
+        """
+        end = pos + _STREAM_WINDOW_CHARS
+        cut = text.rfind("\n", pos + _STREAM_WINDOW_CHARS // 2, end)
+        cut = cut + 1 if cut != -1 else end
+
+        window = text[pos:cut]
+        spans = self._split_document(window)
+        if len(spans) < 2 or spans[-1].start == 0:
+            # Nothing to carry over (a single chunk can't be re-split into more of itself)
+            spans, next_pos = spans, cut
+        else:
+            spans, next_pos = spans[:-1], pos + spans[-1].start
+        chunks = [chunk for span in spans if (chunk := window[span.start : span.end].strip())]
+        return chunks, next_pos
+
+    def _split_document(self, text: str) -> list[Split]:
+        offsets = self._token_offsets(text, self._encode(text))
+        return self._split_spans(text, offsets, 0, len(text), self.separators)
+
+    def _encode(self, text: str) -> list[int]:
+        """Encode text; large documents are cut at line breaks and encoded in parallel."""
+        if len(text) <= _ENCODE_SEGMENT_CHARS:
+            return self.tokenizer.encode_ordinary(text)
+
+        segments = list(_iter_segments(text, _ENCODE_SEGMENT_CHARS))
+        encoded = self.tokenizer.encode_ordinary_batch(segments, num_threads=os.cpu_count() or 1)
+        return list(chain.from_iterable(encoded))
+
+    def _token_offsets(self, text: str, tokens: list[int]) -> list[int]:
+        """Char index where each token starts, derived from the token byte lengths."""
+        byte_offsets = list(accumulate(map(self._token_sizes.__getitem__, tokens), initial=0))
+        byte_offsets.pop()
+        if text.isascii():
+            return byte_offsets
+
+        # byte -> char: subtract the UTF-8 continuation bytes seen before each offset
+        data = text.encode("utf-8", "surrogatepass")
+        continuation = list(accumulate(data.translate(_UTF8_CONTINUATION), initial=0))
+        return [offset - continuation[offset] for offset in byte_offsets]
+
+    @staticmethod
+    def _span(offsets: list[int], start: int, end: int) -> Split:
+        """Split for text[start:end], locating its tokens by binary search."""
+        return Split(start, end, bisect_left(offsets, start), bisect_left(offsets, end))
+
+    @staticmethod
+    def _iter_pieces(text: str, start: int, end: int, separator: str):
+        """Yield spans of text[start:end] split on separator (kept at the end of each piece)."""
+        pos = start
+        while (idx := text.find(separator, pos, end)) != -1:
+            yield pos, idx + len(separator)
+            pos = idx + len(separator)
+        yield pos, end
+
+    def _split_spans(
+        self, text: str, offsets: list[int], start: int, end: int, separators: list[str]
+    ) -> list[Split]:
         separator = separators[-1]
         new_separators = []
 
@@ -226,165 +478,319 @@ class RecursiveTokenSplitter:
             if sep == "":
                 separator = ""
                 break
-            if sep in text:
+            if text.find(sep, start, end) != -1:
                 separator = sep
                 new_separators = separators[i + 1 :]
                 break
 
-        splits = text.split(separator) if separator else list(text)
-        good_splits = []
+        if not separator:
+            # No separator left (e.g. base64 blobs): slice token windows directly
+            # instead of splitting into one piece per character
+            return self._force_split(offsets, start, end)
 
-        for split in splits:
-            if not split.strip():
+        good_splits = []
+        # Pieces are contiguous, so each one's first token is the previous one's end
+        token_end = bisect_left(offsets, start)
+        for piece_start, piece_end in self._iter_pieces(text, start, end, separator):
+            token_start, token_end = token_end, bisect_left(offsets, piece_end)
+            if not _NON_SPACE_RE.search(text, piece_start, piece_end):
                 continue
 
-            # Reattach separator if it's not empty/whitespace
-            if separator:
-                split = (
-                    split + separator
-                )  # This is a simplification; ideally we keep separators intelligently
-
-            if self._length(split) < self.chunk_size:
-                good_splits.append(split)
+            if token_end - token_start < self.chunk_size:
+                good_splits.append(Split(piece_start, piece_end, token_start, token_end))
+            elif new_separators:
+                good_splits.extend(
+                    self._split_spans(text, offsets, piece_start, piece_end, new_separators)
+                )
             else:
-                if new_separators:
-                    good_splits.extend(self._split_text_recursive(split, new_separators))
-                else:
-                    # Forced split if no separators left
-                    good_splits.extend(self._force_split(split))
-
-        return self._merge_splits(good_splits)
+                # Forced split if no separators left
+                good_splits.extend(self._force_split(offsets, piece_start, piece_end))
+
+        return self._merge_splits(offsets, good_splits)
+
+    def _force_split(self, offsets: list[int], start: int, end: int) -> list[Split]:
+        """Split a span into fixed token windows of chunk_size with chunk_overlap."""
+        first = bisect_left(offsets, start)
+        last = bisect_left(offsets, end)
+        step = self.chunk_size - self.chunk_overlap
+
+        spans = []
+        for i in range(first, last, step):
+            stop = i + self.chunk_size
+            if stop >= last:
+                spans.append(self._span(offsets, offsets[i], end))
+                break
+            spans.append(self._span(offsets, offsets[i], offsets[stop]))
+        return spans or [Split(start, end, first, last)]
 
-    def _force_split(self, text: str) -> list[str]:
-        """Split text that forces checking against token limit directly."""
-        tokens = self.tokenizer.encode(text)
+    def _merge_splits(self, offsets: list[int], splits: list[Split]) -> list[Split]:
+        """Merge consecutive spans into chunks of at most chunk_size tokens with overlap."""
         chunks = []
-        for i in range(0, len(tokens), self.chunk_size - self.chunk_overlap):
-            chunk_tokens = tokens[i : i + self.chunk_size]
-            chunks.append(self.tokenizer.decode(chunk_tokens))
-        return chunks
+        if not splits:
+            return chunks
+
+        # The chunk being built is tracked as plain ints; a Split is only built on emit
+        start, end, token_start, token_end = splits[0]
+        for split in islice(splits, 1, None):
+            # Tokens of the union start..split.end, gaps between splits included
+            if split.token_end - token_start <= self.chunk_size:
+                if split.end > end:
+                    end, token_end = split.end, split.token_end
+                continue
 
-    def _merge_splits(self, splits: list[str]) -> list[str]:
-        """Merge smaller splits into chunks of max_size with overlap."""
-        chunks = []
-        current_chunk = []
-        current_len = 0
-
-        for split in splits:
-            split_len = self._length(split)
-            if current_len + split_len > self.chunk_size:
-                if current_chunk:
-                    joined_doc = "".join(current_chunk).strip()
-                    if joined_doc:
-                        chunks.append(joined_doc)
-
-                        # Apply overlap: retain end of previous chunk for context
-                        if self.chunk_overlap > 0 and len(joined_doc) > self.chunk_overlap:
-                            overlap_text = joined_doc[-self.chunk_overlap :]
-                            current_chunk = [overlap_text, split]
-                            current_len = self._length(overlap_text) + split_len
-                        else:
-                            current_chunk = [split]
-                            current_len = split_len
-                    else:
-                        current_chunk = [split]
-                        current_len = split_len
-                else:
-                    current_chunk = [split]
-                    current_len = split_len
-            else:
-                current_chunk.append(split)
-                current_len += split_len
+            chunks.append(Split(start, end, token_start, token_end))
+            previous_token_start, previous_token_end = token_start, token_end
+            start, end, token_start, token_end = split
 
-        if current_chunk:
-            doc = "".join(current_chunk).strip()
-            if doc:
-                chunks.append(doc)
+            # Apply overlap: retain the last chunk_overlap tokens of the previous chunk
+            if self.chunk_overlap > 0:
+                overlap_token = max(previous_token_end - self.chunk_overlap, previous_token_start)
+                if overlap_token < len(offsets):
+                    overlap_start = offsets[overlap_token]
+                    overlap_token = bisect_left(offsets, overlap_start, hi=overlap_token)
+                    if overlap_start < start and token_end - overlap_token <= self.chunk_size:
+                        start, token_start = overlap_start, overlap_token
 
+        chunks.append(Split(start, end, token_start, token_end))
         return chunks
 
-    def _length(self, text: str) -> int:
-        return len(self.tokenizer.encode(text))
+
+@functools.lru_cache(maxsize=8)
+def _get_splitter(chunk_size: int, overlap: int) -> RecursiveTokenSplitter:
+    # The splitter holds no per-document state, so one instance serves every file
+    return RecursiveTokenSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
 
 
 def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> list[str]:
     """Uses RecursiveTokenSplitter for chunking."""
-    splitter = RecursiveTokenSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
-    return splitter.split_text(text)
+    return _get_splitter(chunk_size, overlap).split_text(text)
+
+
+def chunk_segments(segments: Iterable[str], chunk_size: int = 1000, overlap: int = 200):
+    """Streaming variant of chunk_text for extractor output (pages, paragraphs...)."""
+    return _get_splitter(chunk_size, overlap).split_stream(segments)
 
 
 SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".html", ".txt", ".md", ".text"}
 
 
-def get_files_from_path(path: Path, recursive: bool = True) -> list[Path]:
-    """Get all supported files from a path (file or directory)."""
+def _sorted_entries(directory: str) -> list[os.DirEntry]:
+    try:
+        with os.scandir(directory) as it:
+            return sorted(it, key=lambda entry: entry.name)
+    except OSError as e:
+        logger.warning("Cannot read directory %s: %s", directory, e)
+        return []
+
+
+def get_files_from_path(path: Path, recursive: bool = True) -> Iterator[Path]:
+    """Yield all supported files from a path (file or directory).
+
+    Percorre o diretório com os.scandir em profundidade, ordenando cada diretório
+    individualmente: a ordem final é a mesma de sorted(rglob(...)), mas o primeiro
+    arquivo sai sem precisar listar a árvore inteira.
+    """
     if path.is_file():
         if path.suffix.lower() in SUPPORTED_EXTENSIONS:
-            return [path]
-        return []
+            yield path
+        return
+
+    stack = [iter(_sorted_entries(str(path)))]
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+        elif entry.is_dir(follow_symlinks=False):
+            if recursive:
+                stack.append(iter(_sorted_entries(entry.path)))
+        elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS:
+            yield Path(entry.path)
+
+
+def extract_text(file_path: Path) -> Iterator[str] | None:
+    """Return a lazy text stream for a supported file. Returns None for unsupported formats."""
+    suffix = file_path.suffix.lower()
 
-    # It's a directory
-    if recursive:
-        files = [
-            f for f in path.rglob("*") if f.is_file() and f.suffix.lower() in SUPPORTED_EXTENSIONS
-        ]
-    else:
-        files = [
-            f for f in path.iterdir() if f.is_file() and f.suffix.lower() in SUPPORTED_EXTENSIONS
-        ]
+    if suffix == ".pdf":
+        return extract_text_from_pdf(file_path)
+    if suffix == ".docx":
+        return extract_text_from_docx(file_path)
+    if suffix == ".html":
+        return extract_text_from_html(file_path)
+    if suffix in [".txt", ".md", ".text"]:
+        return extract_text_from_txt(file_path)
 
-    return sorted(files)
+    logger.warning("Unsupported format: %s", suffix)
+    return None
 
 
-async def process_single_file(file_path: Path, chunk_size: int, overlap: int) -> bool:
-    """Process a single file and add to RAG. Returns True on success."""
-    suffix = file_path.suffix.lower()
+def _extract_dispatch(file_path: Path, chunk_size: int, overlap: int) -> list[str] | None:
+    """Extract and chunk a file in a worker process (top-level, so it pickles).
 
-    try:
-        if suffix == ".pdf":
-            text = extract_text_from_pdf(file_path)
-        elif suffix == ".docx":
-            text = extract_text_from_docx(file_path)
-        elif suffix == ".html":
-            text = extract_text_from_html(file_path)
-        elif suffix in [".txt", ".md", ".text"]:
-            text = file_path.read_text(encoding="utf-8")
-        else:
-            logger.warning("Unsupported format: %s", suffix)
-            return False
-    except Exception as e:
-        logger.error("Failed to extract text from %s: %s", file_path.name, e)
-        return False
+    The extracted pages stream straight into the splitter, so only the chunks are sent
+    back to the pipeline, never the file's whole text.
+    """
+    segments = extract_text(file_path)
+    if segments is None:
+        return None
+    return list(chunk_segments(segments, chunk_size=chunk_size, overlap=overlap))
 
-    if not text.strip():
-        logger.warning("No text found in %s", file_path.name)
-        return False
 
-    # Chunk text
-    chunks = chunk_text(text, chunk_size=chunk_size, overlap=overlap)
-    logger.info("  🧩 Split into %d chunks", len(chunks))
+def _make_proc_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool for extraction, created per pipeline run (importing spawns nothing).
+
+    PDF/DOCX/HTML parsing holds the GIL, so extraction runs in processes, not threads.
+    "spawn" keeps children from forking a parent that may already run threads.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
 
-    # Prepare data for RAG
+
+def build_metadatas(file_path: Path, chunk_count: int) -> list[dict]:
+    """Per-chunk metadata for a file's chunks (source, index and legal metadata)."""
     file_metadata = extract_legal_metadata(file_path.name)
 
-    metadatas = []
-    for i in range(len(chunks)):
-        chunk_meta = {
+    return [
+        {
             "source": file_path.name,
             "chunk_index": i,
             **file_metadata,  # Merge file-level metadata
         }
-        metadatas.append(chunk_meta)
+        for i in range(chunk_count)
+    ]
+
+
+async def run_pipeline(
+    files: Iterable[Path],
+    chunk_size: int,
+    overlap: int,
+    workers: int,
+    embed_batch_size: int = 128,
+    upsert_batch_size: int = 500,
+    flush_interval: float = 2.0,
+) -> tuple[int, int]:
+    """Run extract → chunk → upsert as concurrent stages linked by bounded queues.
+
+    Extraction and chunking run in a process pool created here and shut down at the end,
+    since the PDF/DOCX/HTML parsers hold the GIL; each file's pages are chunked as they are
+    extracted. A single consumer buffers chunks across files and sends them to the RAG
+    service once the buffer reaches `embed_batch_size` chunks or after `flush_interval`
+    seconds without new files. A semaphore caps how many files are in flight ahead of the
+    buffer.
+    Returns (success_count, fail_count).
+    """
+    loop = asyncio.get_running_loop()
+    total = len(files) if isinstance(files, Sized) else None
+    in_flight = asyncio.Semaphore(workers * 2)
+    file_queue: asyncio.Queue = asyncio.Queue(maxsize=workers)
+    chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=workers)
+    counts = {"success": 0, "failed": 0}
+
+    def record(ok: bool) -> None:
+        counts["success" if ok else "failed"] += 1
+
+    def fail() -> None:
+        record(False)
+        in_flight.release()
+
+    async def feeder() -> None:
+        for i, file_path in enumerate(files, 1):
+            await in_flight.acquire()
+            await file_queue.put((i, file_path))
+
+    async def extract_worker() -> None:
+        while (item := await file_queue.get()) is not None:
+            i, file_path = item
+            if total is None:
+                logger.info("[%d] 📄 Processing: %s", i, file_path.name)
+            else:
+                logger.info("[%d/%d] 📄 Processing: %s", i, total, file_path.name)
+            try:
+                chunks = await loop.run_in_executor(
+                    proc_pool, _extract_dispatch, file_path, chunk_size, overlap
+                )
+            except Exception as e:
+                logger.error("Failed to extract text from %s: %s", file_path.name, e)
+                fail()
+                continue
+
+            if chunks is None:
+                # Unsupported format (already logged by the worker)
+                fail()
+            elif not chunks:
+                logger.warning("No text found in %s", file_path.name)
+                fail()
+            else:
+                logger.info("  🧩 %s: split into %d chunks", file_path.name, len(chunks))
+                await chunk_queue.put((file_path, chunks, build_metadatas(file_path, len(chunks))))
+
+    async def upsert_worker() -> None:
+        # Each buffered file keeps its own (chunks, metadatas) pair, so a flush result
+        # maps straight back to the files that were part of it.
+        buffer: list[tuple[Path, list[str], list[dict]]] = []
+        buffered_chunks = 0
+
+        async def flush() -> None:
+            nonlocal buffer, buffered_chunks
+            pending, buffer, buffered_chunks = buffer, [], 0
+            try:
+                ok = await rag_service.add_documents_batched(
+                    [(chunks, metadatas) for _, chunks, metadatas in pending],
+                    embed_batch_size=embed_batch_size,
+                    upsert_batch_size=upsert_batch_size,
+                )
+            except Exception as e:
+                logger.error("  ❌ RAG error: %s", e)
+                ok = False
+
+            for file_path, _, _ in pending:
+                if ok:
+                    logger.info("  ✅ Success: %s", file_path.name)
+                else:
+                    logger.error("  ❌ Failed to add to RAG: %s", file_path.name)
+                record(ok)
+
+        while True:
+            try:
+                item = await asyncio.wait_for(chunk_queue.get(), timeout=flush_interval)
+            except asyncio.TimeoutError:
+                if buffer:
+                    await flush()
+                continue
+
+            if item is None:
+                break
+
+            buffer.append(item)
+            buffered_chunks += len(item[1])
+            # Once buffered, the file no longer counts against the in-flight limit
+            in_flight.release()
+            if buffered_chunks >= embed_batch_size:
+                await flush()
+
+        if buffer:
+            await flush()
+
+    proc_pool = _make_proc_pool(workers)
+    extractors = [asyncio.create_task(extract_worker()) for _ in range(workers)]
+    upserter = asyncio.create_task(upsert_worker())
+    tasks = [*extractors, upserter]
 
     try:
-        if await rag_service.add_documents(chunks, metadatas):
-            return True
-        else:
-            logger.error("  ❌ Failed to add to RAG")
-            return False
-    except Exception as e:
-        logger.error("  ❌ RAG error: %s", e)
-        return False
+        # Drain stage by stage: each sentinel (None) stops one worker of the next stage
+        await feeder()
+        for _ in extractors:
+            await file_queue.put(None)
+        await asyncio.gather(*extractors)
+        await chunk_queue.put(None)
+        await upserter
+    finally:
+        # Workers are stopped first, so nothing is submitted to a pool that is shutting down
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        proc_pool.shutdown(cancel_futures=True)
+
+    return counts["success"], counts["failed"]
 
 
 async def main():
@@ -397,6 +803,30 @@ async def main():
         action="store_true",
         help="Don't search subdirectories (only applies to directory input)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Concurrent extract/chunk workers",
+    )
+    parser.add_argument(
+        "--embed-batch-size",
+        type=int,
+        default=128,
+        help="Chunks buffered across files before each embedding flush",
+    )
+    parser.add_argument(
+        "--upsert-batch-size",
+        type=int,
+        default=500,
+        help="Rows per database write batch",
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=2.0,
+        help="Seconds without new files before flushing a partial buffer",
+    )
 
     args = parser.parse_args()
     input_path: Path = args.path.resolve()
@@ -405,27 +835,25 @@ async def main():
         logger.error("Path not found: %s", input_path)
         sys.exit(1)
 
-    # Get list of files to process
+    # Files are discovered lazily, so ingestion starts before the whole tree is listed
     files = get_files_from_path(input_path, recursive=not args.no_recursive)
+    first_file = next(files, None)
 
-    if not files:
+    if first_file is None:
         logger.error("No supported files found. Supported: %s", ", ".join(SUPPORTED_EXTENSIONS))
         sys.exit(1)
 
-    logger.info("📁 Found %d file(s) to process", len(files))
-
-    # Process each file
-    success_count = 0
-    fail_count = 0
+    logger.info("📁 Processing supported files from %s", input_path)
 
-    for i, file_path in enumerate(files, 1):
-        logger.info("[%d/%d] 📄 Processing: %s", i, len(files), file_path.name)
-
-        if await process_single_file(file_path, args.chunk_size, args.overlap):
-            logger.info("  ✅ Success")
-            success_count += 1
-        else:
-            fail_count += 1
+    success_count, fail_count = await run_pipeline(
+        chain([first_file], files),
+        args.chunk_size,
+        args.overlap,
+        workers=max(1, args.workers),
+        embed_batch_size=max(1, args.embed_batch_size),
+        upsert_batch_size=max(1, args.upsert_batch_size),
+        flush_interval=args.flush_interval,
+    )
 
     # Summary
     logger.info("=" * 50)
@@ -2,10 +2,12 @@ import asyncio
 import logging
 import os
 import sys
+from pathlib import Path
 
-import asyncpg
 from dotenv import load_dotenv
 
+sys.path.append(str(Path(__file__).parent.parent))
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -14,16 +16,19 @@ load_dotenv()
 
 
 async def init_db():
-    dsn = os.getenv("DATABASE_URL")
-    if not dsn:
+    if not (os.getenv("DB_POOL_DSN") or os.getenv("DATABASE_URL")):
         logger.error("❌ DATABASE_URL not set in environment")
         sys.exit(1)
 
+    # Same pool (DSN and settings) as the bot and the other scripts
+    from src.database import db_service
+
     logger.info("🔌 Connecting to database...")
     conn = None
     try:
         # Wrap connection in a timeout to prevent hanging
-        conn = await asyncio.wait_for(asyncpg.connect(dsn), timeout=10.0)
+        await asyncio.wait_for(db_service.connect(min_size=1, max_size=1), timeout=10.0)
+        conn = await db_service.pool.acquire()
 
         # Simple health check
         await conn.fetchval("SELECT 1")
@@ -70,8 +75,8 @@ async def init_db():
         sys.exit(1)
     finally:
         if conn:
-            await conn.close()
-            logger.info("🔌 Connection closed.")
+            await db_service.pool.release(conn)
+        await db_service.close()
 
 
 if __name__ == "__main__":
@@ -21,8 +21,11 @@ CREATE TABLE IF NOT EXISTS messages (
     role TEXT NOT NULL,
     content TEXT NOT NULL,
     token_count INTEGER DEFAULT 0,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    -- Discord display name of a user message's sender (threads can have several users)
+    author TEXT
 );
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS author TEXT;
 
 -- Analytics table (independent of thread lifecycle for data retention)
 CREATE TABLE IF NOT EXISTS analytics (
@@ -38,7 +41,13 @@ CREATE TABLE IF NOT EXISTS analytics (
 );
 
 -- Optimization: Indexes for common lookups
-CREATE INDEX IF NOT EXISTS idx_messages_thread_id ON messages(thread_id);
+-- History pages (get_messages/get_messages_page) read newest-first per thread straight
+-- off this index, id breaking created_at ties; it also serves plain thread_id lookups,
+-- replacing idx_messages_thread_id and idx_messages_thread_created
+CREATE INDEX IF NOT EXISTS idx_messages_thread_created_id
+    ON messages(thread_id, created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_messages_thread_id;
+DROP INDEX IF EXISTS idx_messages_thread_created;
 CREATE INDEX IF NOT EXISTS idx_threads_active ON threads(thread_id) WHERE is_active = TRUE;
 CREATE INDEX IF NOT EXISTS idx_analytics_created_at ON analytics(created_at);
 
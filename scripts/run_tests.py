@@ -6,6 +6,7 @@ and checking coverage requirements.
 """
 
 import argparse
+import importlib.util
 import subprocess
 import sys
 
@@ -32,10 +33,15 @@ def run_command(command, cwd=None, capture_output=False):
         )
 
 
-def run_tests(suite=None, coverage=True):
-    """Run tests using pytest."""
+def run_tests(suite=None, coverage=True, serial=False):
+    """Run tests using pytest (in parallel with pytest-xdist unless serial=True)."""
     base_cmd = ["pytest"]
 
+    if not serial and importlib.util.find_spec("xdist"):
+        # loadgroup: tests marked xdist_group("db") share one worker (they truncate
+        # shared tables); everything else is spread across all cores.
+        base_cmd.extend(["-n", "auto", "--dist=loadgroup"])
+
     if suite:
         if suite == "unit":
             base_cmd.append("tests/unit")
@@ -67,11 +73,12 @@ def main():
         help="Test suite to run",
     )
     parser.add_argument("--no-cov", action="store_true", help="Disable coverage reporting")
+    parser.add_argument("--serial", action="store_true", help="Run tests in a single process")
 
     args = parser.parse_args()
 
     suite = args.suite if args.suite != "all" else None
-    success = run_tests(suite, coverage=not args.no_cov)
+    success = run_tests(suite, coverage=not args.no_cov, serial=args.serial)
 
     if success:
         print("\n✅ Tests passed!")
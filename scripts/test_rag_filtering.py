@@ -1,5 +1,4 @@
 import asyncio
-import json
 import logging
 import sys
 from pathlib import Path
@@ -22,27 +21,29 @@ async def verify_filtering():
     try:
         # 1. Verify Metadata Persistence
         logger.info("🔍 Step 1: Checking metadata in database...")
-        await db_service.connect()
+        expected = {"type": "Lei", "number": "14133"}
+        await db_service.connect(min_size=1, max_size=2)
         async with db_service.pool.acquire() as conn:
-            # Check one random chunk from this file
-            row = await conn.fetchrow("""
+            # Check one chunk from this law's file, picked by its source file name
+            # (generated `source` column), not by the metadata being verified
+            stmt = await conn.prepare(
+                """
                 SELECT metadata
                 FROM documents
-                WHERE metadata->>'source' LIKE '%Lei 14133%'
+                WHERE source LIKE $1
                 LIMIT 1
-            """)
+                """
+            )
+            row = await stmt.fetchrow("%Lei 14133%")
 
             if not row:
                 logger.error("❌ No documents found for Lei 14133")
                 return  # Exit gracefully instead of sys.exit(1) to allow finally cleanup
 
-            if isinstance(row["metadata"], str):
-                meta = json.loads(row["metadata"])
-            else:
-                meta = row["metadata"]
+            # The pool's jsonb codec already decodes metadata to a dict
+            meta = row["metadata"]
             logger.info(f"   found metadata: {meta}")
 
-            expected = {"type": "Lei", "number": "14133"}
             if meta.get("type") == "Lei" and meta.get("number") == "14133":
                 logger.info("   ✅ Metadata extraction verified!")
             else:
@@ -51,11 +52,12 @@ async def verify_filtering():
         # 2. Verify RAG Filtering (Correct Filter)
         logger.info("\n🔍 Step 2: Testing RAG with CORRECT filter (number=14133)...")
         try:
-            results = await rag_service.query(
+            # Only the hit count matters here: skip fetching chunk contents
+            count = await rag_service.count_matches(
                 "licitação", n_results=3, filter_metadata={"number": "14133"}
             )
-            if results:
-                logger.info(f"   ✅ Got {len(results)} results (GOOD)")
+            if count > 0:
+                logger.info(f"   ✅ Got {count} results (GOOD)")
             else:
                 logger.error("   ❌ Got 0 results with correct filter (BAD)")
         except Exception as e:
@@ -64,14 +66,14 @@ async def verify_filtering():
         # 3. Verify RAG Filtering (Incorrect Filter)
         logger.info("\n🔍 Step 3: Testing RAG with INCORRECT filter (number=99999)...")
         try:
-            results_bad = await rag_service.query(
+            count_bad = await rag_service.count_matches(
                 "licitação", n_results=3, filter_metadata={"number": "99999"}
             )
-            if not results_bad:
+            if count_bad == 0:
                 logger.info("   ✅ Got 0 results (GOOD - filter excluded everything)")
             else:
                 logger.error(
-                    f"   ❌ Got {len(results_bad)} results (BAD - filter should have excluded these)"
+                    f"   ❌ Got {count_bad} results (BAD - filter should have excluded these)"
                 )
         except Exception as e:
             logger.error("   ❌ Failed during Incorrect Filter Query: %s", e)
@@ -8,8 +8,6 @@ from dotenv import load_dotenv
 sys.path.append(str(Path(__file__).parent.parent))
 load_dotenv()
 
-from src.database import db_service  # noqa: E402
-
 
 async def clean_db(force: bool):
     if not force:
@@ -25,14 +23,17 @@ async def clean_db(force: bool):
             print("Aborted.")
             return
 
+    # Imported only once confirmed: --help or an aborted prompt skip loading asyncpg
+    from src.database import db_service
+
     try:
         print("Connecting to DB...")
-        await db_service.connect()
+        await db_service.connect(min_size=1, max_size=1)
         async with db_service.pool.acquire() as conn:
             print("Truncating documents table...")
-            # Using CASCADE to handle any foreign key dependencies
-            # Using RESTART IDENTITY to reset auto-increment counters
-            await conn.execute("TRUNCATE TABLE documents RESTART IDENTITY CASCADE;")
+            # ONLY: skip partitions/inheritors; no table references documents, so no CASCADE
+            # RESTART IDENTITY resets the auto-increment counter
+            await conn.execute("TRUNCATE TABLE ONLY documents RESTART IDENTITY;")
             print("✅ Documents table truncated successfully.")
     except Exception as e:
         print(f"❌ Failed to truncate table due to error (potentially constraints/locks): {e}")
@@ -7,7 +7,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from src.base import ThreadConfig  # noqa: E402
-from src.database import db_service  # noqa: E402
+from src.database import DatabaseService, db_service  # noqa: E402
 from src.utils import logger  # noqa: E402
 
 # Configure logging to show output, only if not already configured
@@ -29,13 +29,28 @@ async def verify_db():
         test_user_id = 777777
         test_config = ThreadConfig(model="gpt-4", temperature=0.5, max_tokens=100)
 
+        await db_service.connect(min_size=1, max_size=1)
         logger.info("Testing save_thread...")
-        await db_service.save_thread(test_thread_id, test_guild_id, test_user_id, test_config)
+        saved = await db_service.save_thread(
+            test_thread_id, test_guild_id, test_user_id, test_config
+        )
 
+        # Read back through a second service: its config cache is empty, so this is a
+        # real SELECT of the row save_thread wrote
         logger.info("Testing get_thread_config...")
-        retrieved = await db_service.get_thread_config(test_thread_id)
+        reader = DatabaseService()
+        await reader.connect(min_size=1, max_size=1)
+        try:
+            retrieved = await reader.get_thread_config(test_thread_id)
+        finally:
+            await reader.close()
 
-        if retrieved and retrieved.model == "gpt-4" and retrieved.temperature == 0.5:
+        if (
+            retrieved
+            and retrieved == saved
+            and retrieved.model == "gpt-4"
+            and retrieved.temperature == 0.5
+        ):
             logger.info("✅ Database verification successful!")
         else:
             logger.error(f"❌ Database verification failed! Retrieved: {retrieved}")
@@ -10,8 +10,6 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from src.rag_service import rag_service  # noqa: E402
-
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,6 +17,9 @@ logger = logging.getLogger(__name__)
 
 async def verify_ingestion():
     """Verify that documents exist in the RAG store."""
+    # Deferred: loads asyncpg and the embedding client
+    from src.rag_service import rag_service
+
     try:
         logger.info("Verifying RAG ingestion status...")
         stats = await rag_service.get_stats()
@@ -1,22 +1,36 @@
+import functools
+import sys
 from dataclasses import dataclass
 from typing import Any, Optional
 
 SEPARATOR_TOKEN = "<|endoftext|>"
+_SEP = "\n" + SEPARATOR_TOKEN
 
 
-@dataclass(frozen=True)
+@functools.lru_cache(maxsize=1024)
+def _render_message(user: str, text: Optional[str]) -> str:
+    result = user + ":"
+    if text is not None:
+        result += " " + text
+    return result
+
+
+@dataclass(frozen=True, slots=True)
 class Message:
     user: str
     text: Optional[str] = None
 
+    def __post_init__(self):
+        # Few distinct users ("system", the bot, a handful of members): share one str each
+        if type(self.user) is str:
+            object.__setattr__(self, "user", sys.intern(self.user))
+
     def render(self):
-        result = self.user + ":"
-        if self.text is not None:
-            result += " " + self.text
-        return result
+        # Frozen: the same (user, text) always renders the same string, e.g. the examples
+        return _render_message(self.user, self.text)
 
 
-@dataclass
+@dataclass(slots=True)
 class Conversation:
     messages: list[Message]
 
@@ -25,28 +39,51 @@ class Conversation:
         return self
 
     def render(self):
-        return f"\n{SEPARATOR_TOKEN}".join([message.render() for message in self.messages])
+        return _SEP.join(message.render() for message in self.messages)
+
 
+def conversations_key(conversations: list[Conversation]) -> tuple[tuple[Message, ...], ...]:
+    """Hashable value of a list of conversations (Messages are frozen), for cache keys."""
+    return tuple(tuple(conversation.messages) for conversation in conversations)
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Config:
     name: str
     instructions: str
     example_conversations: list[Conversation]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ThreadConfig:
     model: str
     max_tokens: int
     temperature: float
 
 
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Runtime settings parsed once from the environment (see src.constants)."""
+
+    allowed_server_ids: tuple[int, ...]
+    moderation_channels: dict[int, int]
+    openrouter_max_retries: int
+    openrouter_timeout: float
+    rag_prefetch_timeout: float
+    cache_max_size: int
+    cache_ttl_seconds: int
+
+
 def get_model_provider(model: Optional[str]) -> str:
     """Normalize model provider from string."""
     if not model or not isinstance(model, str):
         return "other"
+    return _model_provider(model)
 
+
+@functools.lru_cache(maxsize=64)
+def _model_provider(model: str) -> str:
+    # Few distinct model names in practice: each is lowercased and scanned once
     model_lower = model.lower()
     if "anthropic" in model_lower:
         return "anthropic"
@@ -57,7 +94,59 @@ def get_model_provider(model: Optional[str]) -> str:
     return "other"
 
 
-@dataclass(frozen=True)
+# Constant prompt lines, rendered once at import
+_EXAMPLES_HEADER = Message("system", "Example conversations:").render()
+_TRANSITION = Message("system", "Now, you will work with the actual current conversation.").render()
+
+
+def _build_anthropic_content(static_text: str) -> list[dict[str, Any]]:
+    # Anthropic supports explicit caching via cache_control
+    return [{"type": "text", "text": static_text, "cache_control": {"type": "ephemeral"}}]
+
+
+def _build_gemini_content(static_text: str) -> list[dict[str, Any]]:
+    # Gemini: Use structured content but without cache_control keys
+    return [{"type": "text", "text": static_text}]
+
+
+def _build_legacy_content(static_text: str) -> str:
+    # Legacy/OpenAI format (automatic prefix caching)
+    return static_text
+
+
+# System-content builder per provider (keys match get_model_provider)
+_BUILDERS = {
+    "anthropic": _build_anthropic_content,
+    "gemini": _build_gemini_content,
+    "openai": _build_legacy_content,
+    "other": _build_legacy_content,
+}
+
+
+def _static_system_message(
+    header: Message, examples: list[Conversation], provider: str
+) -> dict[str, Any]:
+    """System message with instructions + examples. Shared between calls: don't mutate."""
+    return _render_static_message(header, conversations_key(examples), provider)
+
+
+@functools.lru_cache(maxsize=64)
+def _render_static_message(
+    header: Message, examples: tuple[tuple[Message, ...], ...], provider: str
+) -> dict[str, Any]:
+    # Keyed on the examples' content: the prefix is rendered once per distinct value
+    static_text = _SEP.join(
+        (
+            header.render(),
+            _EXAMPLES_HEADER,
+            *(_SEP.join(message.render() for message in messages) for messages in examples),
+            _TRANSITION,
+        )
+    )
+    return {"role": "system", "content": _BUILDERS[provider](static_text)}
+
+
+@dataclass(frozen=True, slots=True)
 class Prompt:
     header: Message
     examples: list[Conversation]
@@ -66,65 +155,26 @@ class Prompt:
     def full_render(
         self, bot_name: str, model: str, extra_context: str = ""
     ) -> list[dict[str, Any]]:
-        """Render the full prompt for the model, handling provider-specific caching."""
+        """Render the full prompt for the model, handling provider-specific caching.
+
+        Layout: [static system, *history, context system, latest message]. Provider
+        prompt caches only match exact prefixes, so the per-request RAG context goes
+        right before the latest message and instructions + examples + earlier turns
+        stay byte-identical between turns of the same thread.
+        """
         if not model or not model.strip():
             raise ValueError("Model must be a non-empty string.")
 
-        # 1. Build Static Part (Instructions + Examples)
-        # Separated to allow prompt caching of invariant parts.
-        static_parts = (
-            [self.header.render()]
-            + [Message("system", "Example conversations:").render()]
-            + [conversation.render() for conversation in self.examples]
-        )
-
-        static_text = f"\n{SEPARATOR_TOKEN}".join(static_parts)
+        # 1. Static Part (Instructions + Examples): identical on every request
+        messages = [_static_system_message(self.header, self.examples, get_model_provider(model))]
+        messages.extend(self.render_messages(bot_name))
 
-        # 2. Build Dynamic Part (RAG Context + Transition)
-        dynamic_parts = []
+        # 2. Dynamic Part (RAG Context) after the cacheable prefix
         if extra_context and extra_context.strip():
-            # Trim and validate extra_context before using it
-            cleaned_context = extra_context.strip()
-            dynamic_parts.append(cleaned_context)
-            dynamic_parts.append(
-                Message(
-                    "system", "Now, you will work with the actual current conversation."
-                ).render()
+            messages.insert(
+                max(1, len(messages) - 1),
+                {"role": "system", "content": extra_context.strip()},
             )
-
-        dynamic_text = f"\n{SEPARATOR_TOKEN}".join(dynamic_parts)
-
-        # 3. Construct System Content based on Model
-        provider = get_model_provider(model)
-
-        # Anthropic supports explicit caching via cache_control
-        if provider == "anthropic":
-            content = [
-                {"type": "text", "text": static_text, "cache_control": {"type": "ephemeral"}}
-            ]
-            if dynamic_text:
-                content.append({"type": "text", "text": dynamic_text})
-        elif provider == "gemini":
-            # Gemini: Use structured content but without cache_control keys
-            content = [{"type": "text", "text": static_text}]
-            if dynamic_text:
-                content.append({"type": "text", "text": dynamic_text})
-        else:
-            # Legacy/OpenAI format
-            if dynamic_text:
-                content = static_text + f"\n{SEPARATOR_TOKEN}" + dynamic_text
-            else:
-                content = static_text
-
-        messages = [
-            {
-                "role": "system",
-                "content": content,
-            }
-        ]
-
-        for message in self.render_messages(bot_name):
-            messages.append(message)
         return messages
 
     def render_messages(self, bot_name: str):
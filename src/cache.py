@@ -4,11 +4,11 @@ Provides caching for API responses to reduce latency and costs
 for repeated similar queries.
 """
 
+import contextlib
 import hashlib
 import logging
 import threading
 import time
-from collections import OrderedDict
 from collections.abc import Sequence
 from dataclasses import dataclass, field
 from typing import Any, Optional, Protocol
@@ -24,7 +24,7 @@ class MessageLike(Protocol):
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class CacheEntry:
     """Entrada individual do cache."""
 
@@ -39,14 +39,21 @@ class LRUCache:
     Args:
         max_size: Número máximo de entradas no cache
         ttl_seconds: Tempo de vida em segundos para cada entrada
+        thread_safe: Protege o cache com um lock. Desnecessário quando o acesso
+            vem apenas do event loop asyncio (caso do bot).
     """
 
-    def __init__(self, max_size: int = 100, ttl_seconds: int = 3600):
+    def __init__(self, max_size: int = 100, ttl_seconds: int = 3600, thread_safe: bool = False):
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
-        self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
-        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
-        self._lock = threading.Lock()
+        # Plain dict: insertion order is the LRU order (re-inserting a key moves it to the end)
+        self._cache: dict[bytes, CacheEntry] = {}
+        # Plain int attributes: cheaper to bump than dict items on every lookup
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._lock = threading.Lock() if thread_safe else contextlib.nullcontext()
 
     def _hash_key(
         self,
@@ -54,7 +61,7 @@ class LRUCache:
         model: str,
         temperature: float = 1.0,
         max_tokens: int = 512,
-    ) -> str:
+    ) -> bytes:
         """Generates a unique hash for the combination of messages + model config.
 
         Incorporates model parameters (temperature, max_tokens) into the hash to
@@ -63,18 +70,17 @@ class LRUCache:
         # Take the last 5 messages for the hash
         recent_messages = messages[-5:] if len(messages) > 5 else messages
 
-        # Build a list of message properties to hash
-        msg_parts = []
-        for m in recent_messages:
-            user = getattr(m, "user", "unknown")
-            text = getattr(m, "text", str(m))
-            msg_parts.append(f"{user}:{text}")
-
-        convo_str = "|".join(msg_parts)
-        content = f"{model}:{temperature}:{max_tokens}:{convo_str}"
-
-        # Use a longer SHA-256 hex prefix to further reduce collision risk
-        return hashlib.sha256(content.encode()).hexdigest()
+        # BLAKE2b-128 is faster than SHA-256 and ample for an in-process cache;
+        # the raw digest is used as the dict key (no hex encoding).
+        # Fed incrementally: no joined conversation string is built.
+        h = hashlib.blake2b(f"{model}:{temperature}:{max_tokens}:".encode(), digest_size=16)
+        for i, m in enumerate(recent_messages):
+            if i:
+                h.update(b"|")
+            h.update(str(getattr(m, "user", "unknown")).encode())
+            h.update(b":")
+            h.update(str(getattr(m, "text", m)).encode())
+        return h.digest()
 
     def get(
         self, messages: Sequence[Any], model: str, temperature: float = 1.0, max_tokens: int = 512
@@ -85,22 +91,25 @@ class LRUCache:
             entry = self._cache.get(key)
 
             if entry is None:
-                self._stats["misses"] += 1
+                self._misses += 1
                 return None
 
             # Check TTL
             if time.time() - entry.created_at > self.ttl_seconds:
                 del self._cache[key]
-                self._stats["misses"] += 1
-                self._stats["expirations"] += 1
-                logger.debug("🗑️ Cache entry expired for key %s", key[:8])
+                self._misses += 1
+                self._expirations += 1
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("🗑️ Cache entry expired for key %s", key[:4].hex())
                 return None
 
             # Move to end (most recent) - LRU
-            self._cache.move_to_end(key)
+            del self._cache[key]
+            self._cache[key] = entry
             entry.hits += 1
-            self._stats["hits"] += 1
-            logger.debug("🎯 Cache HIT for key %s (hits: %d)", key[:8], entry.hits)
+            self._hits += 1
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🎯 Cache HIT for key %s (hits: %d)", key[:4].hex(), entry.hits)
             return entry.value
 
     def set(
@@ -116,19 +125,23 @@ class LRUCache:
         with self._lock:
             if key in self._cache:
                 # If key already exists, just update it and move to end
+                del self._cache[key]
                 self._cache[key] = CacheEntry(value=value)
-                self._cache.move_to_end(key)
-                logger.debug("💾 Cache UPDATE for key %s", key[:8])
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("💾 Cache UPDATE for key %s", key[:4].hex())
                 return
 
             # Remove oldest entry if limit reached
             if len(self._cache) >= self.max_size:
-                oldest_key, _ = self._cache.popitem(last=False)
-                self._stats["evictions"] += 1
-                logger.debug("🗑️ Cache evicted oldest entry: %s", oldest_key[:8])
+                oldest_key = next(iter(self._cache))
+                del self._cache[oldest_key]
+                self._evictions += 1
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("🗑️ Cache evicted oldest entry: %s", oldest_key[:4].hex())
 
             self._cache[key] = CacheEntry(value=value)
-            logger.debug("💾 Cache SET for key %s (size: %d)", key[:8], len(self._cache))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("💾 Cache SET for key %s (size: %d)", key[:4].hex(), len(self._cache))
 
     def clear(self) -> None:
         """Clears the entire cache."""
@@ -140,10 +153,13 @@ class LRUCache:
     def stats(self) -> dict[str, Any]:
         """Returns cache statistics."""
         with self._lock:
-            total = self._stats["hits"] + self._stats["misses"]
-            hit_rate = (self._stats["hits"] / total * 100) if total > 0 else 0.0
+            total = self._hits + self._misses
+            hit_rate = (self._hits / total * 100) if total > 0 else 0.0
             return {
-                **self._stats,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
                 "size": len(self._cache),
                 "max_size": self.max_size,
                 "ttl_seconds": self.ttl_seconds,
@@ -167,11 +183,14 @@ class LRUCache:
 try:
     from src.constants import CACHE_MAX_SIZE, CACHE_TTL_SECONDS
 
-    response_cache = LRUCache(max_size=CACHE_MAX_SIZE, ttl_seconds=CACHE_TTL_SECONDS)
+    # Only accessed from the asyncio event loop, so no lock is needed
+    response_cache = LRUCache(
+        max_size=CACHE_MAX_SIZE, ttl_seconds=CACHE_TTL_SECONDS, thread_safe=False
+    )
     logger.debug(
         "⚙️ Cache initialized with settings: max_size=%d, ttl=%ds", CACHE_MAX_SIZE, CACHE_TTL_SECONDS
     )
 except ImportError as e:
     # Fallback to default values if constants not available
     logger.warning("⚠️ Could not import cache settings from constants, using defaults: %s", e)
-    response_cache = LRUCache(max_size=100, ttl_seconds=3600)
+    response_cache = LRUCache(max_size=100, ttl_seconds=3600, thread_safe=False)
@@ -1,4 +1,6 @@
 import asyncio
+import re
+from typing import Optional
 
 import discord
 from discord import Message as DiscordMessage
@@ -7,7 +9,7 @@ from discord.ext import commands
 
 from src import completion
 from src.base import Message, ThreadConfig
-from src.completion import generate_completion_response, process_response
+from src.completion import StreamingReply, generate_completion_response, process_response
 from src.constants import (
     ACTIVATE_THREAD_PREFIX,
     AVAILABLE_MODELS,
@@ -21,6 +23,7 @@ from src.constants import (
     SECONDS_DELAY_RECEIVING_MSG,
 )
 from src.database import DatabaseService
+from src.db_writer import MessageLogWriter, message_log_writer
 from src.moderation import (
     moderate_message,
     send_moderation_blocked_message,
@@ -32,17 +35,27 @@ from src.utils import (
     discord_message_to_message,
     is_last_message_stale,
     logger,
+    mention_thread_id,
     should_block,
-    split_into_shorter_messages,
 )
 
+# User mentions, <@id> or nickname form <@!id>
+_MENTION_RE = re.compile(r"<@!?\d+>")
+
 
 class ChatCog(commands.Cog):
     """Chat command and message handlers for the bot."""
 
-    def __init__(self, bot: commands.Bot, db_service: DatabaseService) -> None:
+    def __init__(
+        self,
+        bot: commands.Bot,
+        db_service: DatabaseService,
+        log_writer: Optional[MessageLogWriter] = None,
+    ) -> None:
         self.bot = bot
         self.db_service = db_service
+        # Message logs are enqueued and written in batches off the request path
+        self.log_writer = log_writer or message_log_writer
 
     async def cog_app_command_error(
         self, interaction: discord.Interaction, error: discord.app_commands.AppCommandError
@@ -100,6 +113,7 @@ class ChatCog(commands.Cog):
                 "command": "chat",
             },
         )
+        rag_task: Optional[asyncio.Task] = None
         try:
             if not isinstance(interaction.channel, discord.TextChannel):
                 return
@@ -142,19 +156,21 @@ class ChatCog(commands.Cog):
 
             try:
                 flagged_str, blocked_str = moderate_message(message=message, user=user)
-                await send_moderation_blocked_message(
-                    guild=interaction.guild,
-                    user=user,
-                    blocked_str=blocked_str,
-                    message=message,
-                )
                 if len(blocked_str) > 0:
+                    await send_moderation_blocked_message(
+                        guild=interaction.guild,
+                        user=user,
+                        blocked_str=blocked_str,
+                        message=message,
+                    )
                     await interaction.response.send_message(
                         f"Your prompt has been blocked by moderation.\n{message}",
                         ephemeral=True,
                     )
                     return
 
+                rag_task = self._prefetch_rag(message)
+
                 embed = discord.Embed(
                     description=f"<@{user.id}> wants to chat! 🤖💬",
                     color=discord.Color.green(),
@@ -171,13 +187,14 @@ class ChatCog(commands.Cog):
                 await interaction.response.send_message(embed=embed)
                 response = await interaction.original_response()
 
-                await send_moderation_flagged_message(
-                    guild=interaction.guild,
-                    user=user,
-                    flagged_str=flagged_str,
-                    message=message,
-                    url=response.jump_url,
-                )
+                if len(flagged_str) > 0:
+                    await send_moderation_flagged_message(
+                        guild=interaction.guild,
+                        user=user,
+                        flagged_str=flagged_str,
+                        message=message,
+                        url=response.jump_url,
+                    )
             except Exception as exc:
                 logger.exception("Failed to start chat via moderation/embed block")
                 await interaction.response.send_message(
@@ -195,30 +212,43 @@ class ChatCog(commands.Cog):
             thread_config = ThreadConfig(
                 model=model, max_tokens=max_tokens, temperature=temperature
             )
-            await self.db_service.save_thread(
-                thread_id=thread.id,
-                guild_id=interaction.guild_id,
-                user_id=user.id,
-                config=thread_config,
-            )
-            await self.db_service.log_message(thread_id=thread.id, role="user", content=message)
-
             async with thread.typing():
                 messages = [Message(user=user.name, text=message)]
-                response_data = await generate_completion_response(
-                    messages=messages,
-                    user=user,
-                    thread_config=thread_config,
-                    bot_name=self.bot.bot_name,
-                    example_conversations=self.bot.example_conversations,
+                stream = StreamingReply(thread.send)
+                # The completion only needs the local message: persist the thread meanwhile
+                _, response_data = await asyncio.gather(
+                    self.db_service.save_thread_and_log(
+                        thread_id=thread.id,
+                        guild_id=interaction.guild_id,
+                        user_id=user.id,
+                        config=thread_config,
+                        role="user",
+                        content=message,
+                        author=user.name,
+                    ),
+                    generate_completion_response(
+                        messages=messages,
+                        user=user,
+                        thread_config=thread_config,
+                        bot_name=self.bot.bot_name,
+                        example_conversations=self.bot.example_conversations,
+                        rag_future=rag_task,
+                        stream=stream,
+                    ),
                 )
-                if response_data.reply_text:
-                    await self.db_service.log_message(
+                await process_response(
+                    user=user, thread=thread, response_data=response_data, stream=stream
+                )
+                # Logged only once shown, as in on_message
+                if response_data.reply_text and response_data.status in (
+                    completion.CompletionResult.OK,
+                    completion.CompletionResult.MODERATION_FLAGGED,
+                ):
+                    self.log_writer.log_message(
                         thread_id=thread.id,
                         role="assistant",
                         content=response_data.reply_text,
                     )
-                await process_response(user=user, thread=thread, response_data=response_data)
         except Exception as exc:
             logger.exception("Failed to start chat: %s", exc)
             if not interaction.response.is_done():
@@ -227,17 +257,33 @@ class ChatCog(commands.Cog):
                 )
             else:
                 await interaction.followup.send(f"Failed to start chat: {str(exc)}", ephemeral=True)
+        finally:
+            # Never left running when the chat fails before the completion awaited it
+            if rag_task is not None:
+                rag_task.cancel()
+
+    @staticmethod
+    async def _try_delete(message: DiscordMessage) -> bool:
+        try:
+            await message.delete()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _prefetch_rag(query_text: str) -> asyncio.Task:
+        """Start RAG retrieval now so it overlaps with the Discord/DB work before the LLM call."""
+        from src.rag_service import rag_service
+
+        return asyncio.create_task(rag_service.query(query_text))
 
     async def handle_mention(self, message: DiscordMessage) -> None:
         """Handle when the bot is mentioned directly in a channel."""
-        content = message.content
-        for mention in message.mentions:
-            content = content.replace(f"<@{mention.id}>", "").replace(f"<@!{mention.id}>", "")
-        content = content.strip()
+        content = _MENTION_RE.sub("", message.content).strip()
 
         # Per-user thread ID for isolated conversation history
         # Combining channel and user ensures each user has their own history
-        thread_id = hash(f"{message.channel.id}_{message.author.id}") % (10**18)
+        thread_id = mention_thread_id(message.channel.id, message.author.id)
         if not content:
             history = await self.db_service.get_messages(thread_id=thread_id, limit=1)
             if history:
@@ -264,6 +310,8 @@ class ChatCog(commands.Cog):
             await message.reply("❌ Seu prompt foi bloqueado por moderação.")
             return
 
+        rag_task = self._prefetch_rag(content)
+
         if len(flagged_str) > 0:
             logger.warning("Flagged mention from %s: %s", message.author, flagged_str)
 
@@ -276,43 +324,48 @@ class ChatCog(commands.Cog):
         guild_id = message.guild.id if message.guild else 0
         user_id = message.author.id
 
-        async with message.channel.typing():
-            # 1. Ensure thread entry for history tracking
-            await self.db_service.save_thread(
-                thread_id=thread_id,
-                guild_id=guild_id,
-                user_id=user_id,
-                config=thread_config,
-            )
-
-            # 2. Log current message
-            await self.db_service.log_message(
-                thread_id=thread_id,
-                role="user",
-                content=content,
-            )
+        try:
+            async with message.channel.typing():
+                # The previous reply may still be queued: land it before this message so the
+                # database stamps them in order
+                await self.log_writer.flush_thread(thread_id)
+                # 1-2. Ensure thread entry for history tracking and log current message
+                await self.db_service.save_thread_and_log(
+                    thread_id=thread_id,
+                    guild_id=guild_id,
+                    user_id=user_id,
+                    config=thread_config,
+                    role="user",
+                    content=content,
+                    author=message.author.name,
+                )
 
-            # 3. Retrieve history (last 10 messages)
-            messages = await self.db_service.get_messages(thread_id=thread_id, limit=10)
+                # 3. Retrieve history (last 10 messages)
+                messages = await self._fetch_db_history(thread_id, limit=10)
 
-            response_data = await generate_completion_response(
-                messages=messages,
-                user=message.author.name,
-                thread_config=thread_config,
-                bot_name=self.bot.bot_name,
-                example_conversations=self.bot.example_conversations,
-            )
+                stream = StreamingReply(message.reply)
+                response_data = await generate_completion_response(
+                    messages=messages,
+                    user=message.author.name,
+                    thread_config=thread_config,
+                    bot_name=self.bot.bot_name,
+                    example_conversations=self.bot.example_conversations,
+                    rag_future=rag_task,
+                    stream=stream,
+                )
+        finally:
+            # No-op once the completion consumed it; stops the search if an error came first
+            rag_task.cancel()
 
         if response_data.status == completion.CompletionResult.OK and response_data.reply_text:
-            # 4. Log bot reply
-            await self.db_service.log_message(
+            # 4. Log bot reply (batched in background)
+            self.log_writer.log_message(
                 thread_id=thread_id,
                 role="assistant",
                 content=response_data.reply_text,
             )
 
-            for chunk in split_into_shorter_messages(response_data.reply_text):
-                await message.reply(chunk)
+            await stream.finish(response_data.reply_text)
         elif response_data.status == completion.CompletionResult.TOO_LONG:
             await message.reply(
                 "❌ A resposta ficou muito longa. Tente uma pergunta mais específica."
@@ -322,10 +375,38 @@ class ChatCog(commands.Cog):
                 f"❌ Erro ao gerar resposta: {response_data.status_text or 'Erro desconhecido'}"
             )
 
+    async def _fetch_db_history(self, thread_id: int, limit: int) -> list[Message]:
+        """Last `limit` logged messages of a thread, oldest first, replies attributed to the bot."""
+        # Wait for this thread's queued rows so the latest reply is not missing
+        await self.log_writer.flush_thread(thread_id)
+        bot_name = self.bot.bot_name
+        return [
+            Message(user=bot_name if row.user == "assistant" else row.user, text=row.text)
+            for row in await self.db_service.get_messages(thread_id=thread_id, limit=limit)
+        ]
+
+    async def _load_thread_history(self, thread: discord.Thread) -> list[Message]:
+        """Last messages of a bot thread, oldest first."""
+        history_limit = min(OPTIMIZED_HISTORY_LIMIT, MAX_THREAD_MESSAGES)
+        # Every thread message is mirrored in the DB: one query instead of paging
+        # through the Discord history API
+        channel_messages = await self._fetch_db_history(thread.id, history_limit)
+        if len(channel_messages) <= 1:
+            # Only the message just logged: the thread is not tracked in the DB (e.g. it
+            # was created before logging existed), so its history lives in Discord only
+            channel_messages = []
+            async for msg in thread.history(limit=history_limit):
+                converted = discord_message_to_message(msg)
+                if converted:
+                    channel_messages.append(converted)
+            channel_messages.reverse()
+        return channel_messages
+
     @commands.Cog.listener()
     @timed
     async def on_message(self, message: DiscordMessage) -> None:
         """Handle incoming messages for mentions and bot threads."""
+        rag_task: Optional[asyncio.Task] = None
         try:
             if should_block(guild=message.guild):
                 return
@@ -359,52 +440,60 @@ class ChatCog(commands.Cog):
             flagged_str, blocked_str = moderate_message(
                 message=message.content, user=message.author
             )
-            await send_moderation_blocked_message(
-                guild=message.guild,
-                user=message.author,
-                blocked_str=blocked_str,
-                message=message.content,
-            )
             if len(blocked_str) > 0:
-                try:
-                    await message.delete()
-                    await thread.send(
-                        embed=discord.Embed(
-                            description=(
-                                f"❌ **{message.author}'s message has been deleted by moderation.**"
-                            ),
-                            color=discord.Color.red(),
-                        )
+                # Report and delete concurrently, then tell the thread which one happened
+                _, deleted = await asyncio.gather(
+                    send_moderation_blocked_message(
+                        guild=message.guild,
+                        user=message.author,
+                        blocked_str=blocked_str,
+                        message=message.content,
+                    ),
+                    self._try_delete(message),
+                )
+                if deleted:
+                    description = (
+                        f"❌ **{message.author}'s message has been deleted by moderation.**"
                     )
-                    return
-                except Exception:
-                    await thread.send(
+                else:
+                    description = (
+                        "❌ **"
+                        f"{message.author}'s message has been blocked by moderation but could "
+                        "not be deleted. Missing Manage Messages permission in this Channel."
+                        "**"
+                    )
+                await thread.send(
+                    embed=discord.Embed(description=description, color=discord.Color.red())
+                )
+                return
+
+            # Logged before the stale check: a message superseded by a newer one gets no
+            # reply of its own but stays part of the thread's history
+            self.log_writer.log_message(
+                thread_id=thread.id,
+                role="user",
+                content=message.content,
+                author=message.author.name,
+            )
+
+            rag_task = self._prefetch_rag(message.content)
+            if len(flagged_str) > 0:
+                await asyncio.gather(
+                    send_moderation_flagged_message(
+                        guild=message.guild,
+                        user=message.author,
+                        flagged_str=flagged_str,
+                        message=message.content,
+                        url=message.jump_url,
+                    ),
+                    thread.send(
                         embed=discord.Embed(
                             description=(
-                                "❌ **"
-                                f"{message.author}'s message has been blocked by moderation but could "
-                                "not be deleted. Missing Manage Messages permission in this Channel."
-                                "**"
+                                f"⚠️ **{message.author}'s message has been flagged by moderation.**"
                             ),
-                            color=discord.Color.red(),
+                            color=discord.Color.yellow(),
                         )
-                    )
-                    return
-            await send_moderation_flagged_message(
-                guild=message.guild,
-                user=message.author,
-                flagged_str=flagged_str,
-                message=message.content,
-                url=message.jump_url,
-            )
-            if len(flagged_str) > 0:
-                await thread.send(
-                    embed=discord.Embed(
-                        description=(
-                            f"⚠️ **{message.author}'s message has been flagged by moderation.**"
-                        ),
-                        color=discord.Color.yellow(),
-                    )
+                    ),
                 )
 
             if SECONDS_DELAY_RECEIVING_MSG > 0:
@@ -430,19 +519,11 @@ class ChatCog(commands.Cog):
                 },
             )
 
-            await self.db_service.log_message(
-                thread_id=thread.id, role="user", content=message.content
+            # History and config are independent lookups: run them together
+            channel_messages, thread_config = await asyncio.gather(
+                self._load_thread_history(thread),
+                self.db_service.get_thread_config(thread.id),
             )
-
-            history_limit = min(OPTIMIZED_HISTORY_LIMIT, MAX_THREAD_MESSAGES)
-            channel_messages = []
-            async for msg in thread.history(limit=history_limit):
-                converted = discord_message_to_message(msg)
-                if converted:
-                    channel_messages.append(converted)
-            channel_messages.reverse()
-
-            thread_config = await self.db_service.get_thread_config(thread.id)
             if not thread_config:
                 thread_config = ThreadConfig(
                     model=DEFAULT_MODEL,
@@ -450,29 +531,43 @@ class ChatCog(commands.Cog):
                     temperature=DEFAULT_THREAD_TEMPERATURE,
                 )
 
+            def is_stale() -> bool:
+                return is_last_message_stale(
+                    interaction_message=message,
+                    last_message=thread.last_message,
+                    bot_id=self.bot.user.id,
+                )
+
             async with thread.typing():
+                stream = StreamingReply(thread.send, is_stale=is_stale)
                 response_data = await generate_completion_response(
                     messages=channel_messages,
                     user=message.author.name,
                     thread_config=thread_config,
                     bot_name=self.bot.bot_name,
                     example_conversations=self.bot.example_conversations,
+                    rag_future=rag_task,
+                    stream=stream,
                 )
-                if response_data.reply_text:
-                    await self.db_service.log_message(
-                        thread_id=thread.id,
-                        role="assistant",
-                        content=response_data.reply_text,
-                    )
 
-            if is_last_message_stale(
-                interaction_message=message,
-                last_message=thread.last_message,
-                bot_id=self.bot.user.id,
-            ):
+            # Once part of the reply is visible it is always completed
+            if not stream.messages and is_stale():
                 return
 
-            await process_response(user=message.author, thread=thread, response_data=response_data)
+            await process_response(
+                user=message.author, thread=thread, response_data=response_data, stream=stream
+            )
+            # Logged only once shown: a reply dropped as stale or blocked must not
+            # reach the model as part of the thread's history
+            if response_data.reply_text and response_data.status in (
+                completion.CompletionResult.OK,
+                completion.CompletionResult.MODERATION_FLAGGED,
+            ):
+                self.log_writer.log_message(
+                    thread_id=thread.id,
+                    role="assistant",
+                    content=response_data.reply_text,
+                )
         except Exception as e:
             # Safely determine thread_id for logging
             try:
@@ -480,3 +575,7 @@ class ChatCog(commands.Cog):
             except (NameError, AttributeError):
                 thread_id = message.channel.id
             logger.exception("Error processing message in thread (ID: %s): %s", thread_id, str(e))
+        finally:
+            # Stale messages and errors return before the completion awaits the prefetch
+            if rag_task is not None:
+                rag_task.cancel()
@@ -1,12 +1,24 @@
+import asyncio
+import functools
+import time
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional
+from html import escape as html_escape
+from typing import Optional, cast
 
 import discord
 import openai
-from openai import APIConnectionError, APIStatusError, AsyncOpenAI, RateLimitError
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    RateLimitError,
+)
+from openai.types.chat import ChatCompletionMessageParam
 
-from src.base import Conversation, Message, Prompt, ThreadConfig
+from src.base import Conversation, Message, Prompt, ThreadConfig, conversations_key
 from src.cache import response_cache
 from src.constants import (
     BOT_INSTRUCTIONS,
@@ -16,6 +28,8 @@ from src.constants import (
     OPENROUTER_BASE_URL,
     OPENROUTER_MAX_RETRIES,
     OPENROUTER_TIMEOUT,
+    RAG_PREFETCH_TIMEOUT,
+    STREAM_EDIT_INTERVAL,
 )
 from src.moderation import (
     send_moderation_blocked_message,
@@ -24,16 +38,49 @@ from src.moderation import (
 from src.profiling import timed
 from src.utils import close_thread, logger, split_into_shorter_messages
 
+try:
+    import h2  # noqa: F401
+
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# HTTP/2 multiplexes concurrent completions over one TLS connection to OpenRouter.
+# DefaultAsyncHttpxClient keeps the SDK's own timeout/pool defaults.
 client = AsyncOpenAI(
     api_key=OPENROUTER_API_KEY,
     base_url=OPENROUTER_BASE_URL,
     max_retries=OPENROUTER_MAX_RETRIES,
     timeout=OPENROUTER_TIMEOUT,
+    http_client=DefaultAsyncHttpxClient(http2=_HTTP2),
 )
 
 # Remove global variables that are mutated from main.py
 
 
+def examples_with_bot_name(bot_name: str, example_conversations: list) -> list[Conversation]:
+    """Example conversations with BOT_NAME replaced by the bot's actual name (built once).
+
+    Already renamed examples (e.g. the bot's, renamed in on_ready) come back unchanged.
+    """
+    return _rename_examples(bot_name, conversations_key(example_conversations))
+
+
+@functools.lru_cache(maxsize=4)
+def _rename_examples(
+    bot_name: str, examples: tuple[tuple[Message, ...], ...]
+) -> list[Conversation]:
+    return [
+        Conversation(
+            messages=[
+                Message(user=bot_name, text=msg.text) if msg.user == BOT_NAME else msg
+                for msg in messages
+            ]
+        )
+        for messages in examples
+    ]
+
+
 class CompletionResult(Enum):
     OK = 0
     TOO_LONG = 1
@@ -44,13 +91,97 @@ class CompletionResult(Enum):
     RATE_LIMIT = 6
 
 
-@dataclass
+@dataclass(slots=True)
 class CompletionData:
     status: CompletionResult
     reply_text: Optional[str]
     status_text: Optional[str]
 
 
+class StreamingReply:
+    """Discord reply that grows as tokens arrive (edits throttled to respect rate limits).
+
+    Args:
+        send: Sends a new message, e.g. `thread.send` or `message.reply`
+        is_stale: Checked before the first message; if True nothing is sent until `finish`
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[discord.Message]],
+        is_stale: Optional[Callable[[], bool]] = None,
+    ):
+        self._send = send
+        self._is_stale = is_stale
+        self.messages: list[discord.Message] = []
+        self._shown: list[str] = []
+        self._last_flush = 0.0
+        self.aborted = False
+
+    @property
+    def due(self) -> bool:
+        """Whether update() would show anything now; lets callers skip building the text."""
+        return not self.aborted and time.monotonic() - self._last_flush >= STREAM_EDIT_INTERVAL
+
+    async def update(self, text: str) -> None:
+        """Show the partial reply, at most once per STREAM_EDIT_INTERVAL.
+
+        A Discord error only stops the partial updates: the reply keeps streaming
+        and finish() shows the whole text.
+        """
+        if not self.due:
+            return
+        if not self.messages and self._is_stale is not None and self._is_stale():
+            self.aborted = True
+            return
+        try:
+            await self._flush(text)
+        except discord.HTTPException as e:
+            logger.warning("⚠️ Streaming update failed, waiting for the full reply: %s", e)
+            self.aborted = True
+
+    async def finish(self, text: str) -> Optional[discord.Message]:
+        """Show the final reply; returns the last message sent."""
+        try:
+            await self._flush(text)
+        except discord.HTTPException as e:
+            logger.error("❌ Failed to send the final streamed reply: %s", e)
+        return self.messages[-1] if self.messages else None
+
+    async def _flush(self, text: str) -> None:
+        self._last_flush = time.monotonic()
+        # Text only grows, so fixed-size chunks before the last one never change
+        chunks = split_into_shorter_messages(text)
+        changed = [
+            (i, chunk)
+            for i, chunk in enumerate(chunks[: len(self.messages)])
+            if self._shown[i] != chunk
+        ]
+        # Editing the tail of the last message doesn't affect where new chunks land
+        await asyncio.gather(
+            *(self.messages[i].edit(content=chunk) for i, chunk in changed),
+            self._send_new(chunks[len(self.messages) :]),
+        )
+        # Recorded only once shown, so a failed edit is retried by the next flush
+        for i, chunk in changed:
+            self._shown[i] = chunk
+
+    async def _send_new(self, chunks: list[str]) -> None:
+        # Sequential on purpose: concurrent sends can reach the channel out of order
+        for chunk in chunks:
+            if not chunk.strip():
+                # Discord rejects blank messages; stopping here keeps messages[i] on chunks[i]
+                break
+            self.messages.append(await self._send(chunk))
+            self._shown.append(chunk)
+
+
+_EXTRA_HEADERS = {
+    "HTTP-Referer": "https://github.com/prof-ramos/sherlock-discord-bot",
+    "X-Title": "Discord Bot Client",
+}
+
+
 @timed
 async def generate_completion_response(
     messages: list[Message],
@@ -58,6 +189,8 @@ async def generate_completion_response(
     thread_config: ThreadConfig,
     bot_name: str = BOT_NAME,
     example_conversations: list = EXAMPLE_CONVOS,
+    rag_future: Optional[asyncio.Future] = None,
+    stream: Optional[StreamingReply] = None,
 ) -> CompletionData:
     # Verificar cache primeiro
     cached = response_cache.get(
@@ -70,71 +203,96 @@ async def generate_completion_response(
         logger.info(
             "🎯 Cache HIT for model %s (temp=%.1f)", thread_config.model, thread_config.temperature
         )
+        if rag_future is not None:
+            rag_future.cancel()
         return cached
 
     try:
         # RAG Context Injection
         rag_context = ""
         try:
-            # Extract last user message for query
-            last_user_msg = next((m.text for m in reversed(messages) if m.user == str(user)), None)
-            if last_user_msg:
-                from src.rag_service import rag_service
-
-                docs = await rag_service.query(last_user_msg)
-                if docs:
-                    from html import escape as html_escape
-
-                    # XML-structured context with escaped content
-                    indented_docs = "\n".join(
-                        [f"<doc index='{i + 1}'>{html_escape(d)}</doc>" for i, d in enumerate(docs)]
-                    )
-                    rag_text = (
-                        "<relevant_context>\n"
-                        f"{indented_docs}\n"
-                        "</relevant_context>\n\n"
-                        "Instructions:\n"
-                        "1. Use the provided context to answer the user's question.\n"
-                        "2. If the context contains the answer, cite the document index or content.\n"
-                        "3. If the context is valid but insufficient, use your general knowledge but mention the missing details.\n"
-                    )
-                    rag_context = Message("system", rag_text).render()
-                    logger.info("📚 RAG: Injected %d documents into context", len(docs))
+            docs = None
+            if rag_future is not None:
+                # Prefetched by the caller while it handled Discord/DB work
+                try:
+                    docs = await asyncio.wait_for(rag_future, RAG_PREFETCH_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning("⚠️ RAG prefetch timed out, answering without context")
+            else:
+                # Extract last user message for query (usually messages[-1])
+                user_name = str(user)
+                last_user_msg = next(
+                    (m.text for m in reversed(messages) if m.user == user_name), None
+                )
+                if last_user_msg:
+                    from src.rag_service import rag_service
+
+                    docs = await rag_service.query(last_user_msg)
+            if docs:
+                # XML-structured context with escaped content
+                indented_docs = "\n".join(
+                    f"<doc index='{i}'>{html_escape(d)}</doc>" for i, d in enumerate(docs, 1)
+                )
+                rag_text = (
+                    "<relevant_context>\n"
+                    f"{indented_docs}\n"
+                    "</relevant_context>\n\n"
+                    "Instructions:\n"
+                    "1. Use the provided context to answer the user's question.\n"
+                    "2. If the context contains the answer, cite the document index or content.\n"
+                    "3. If the context is valid but insufficient, use your general knowledge but mention the missing details.\n"
+                )
+                # Sent as its own system message, after the cacheable prefix
+                rag_context = rag_text
+                logger.info("📚 RAG: Injected %d documents into context", len(docs))
         except Exception as e:
             logger.error("RAG injection failed: %s", e)
 
         system_instruction = f"Instructions for {bot_name}: {BOT_INSTRUCTIONS}"
 
-        # Create example conversations with the bot's actual name
-        bot_example_conversations = [
-            Conversation(
-                messages=[
-                    Message(user=bot_name, text=msg.text) if msg.user == BOT_NAME else msg
-                    for msg in convo.messages
-                ]
-            )
-            for convo in example_conversations
-        ]
-
         prompt = Prompt(
             header=Message("system", system_instruction),
-            examples=bot_example_conversations,
+            examples=examples_with_bot_name(bot_name, example_conversations),
             convo=Conversation(messages),
         )
-        rendered = prompt.full_render(bot_name, thread_config.model, rag_context)
-        response = await client.chat.completions.create(
-            model=thread_config.model,
-            messages=rendered,
-            temperature=thread_config.temperature,
-            top_p=1.0,
-            max_tokens=thread_config.max_tokens,
-            stop=["<|endoftext|>"],
-            extra_headers={
-                "HTTP-Referer": "https://github.com/prof-ramos/sherlock-discord-bot",
-                "X-Title": "Discord Bot Client",
-            },
+        # Plain dicts in the API's message shape; typed so each create() call picks its overload
+        rendered = cast(
+            list[ChatCompletionMessageParam],
+            prompt.full_render(bot_name, thread_config.model, rag_context),
         )
-        reply = response.choices[0].message.content.strip()
+        if stream is None:
+            response = await client.chat.completions.create(
+                model=thread_config.model,
+                messages=rendered,
+                temperature=thread_config.temperature,
+                top_p=1.0,
+                max_tokens=thread_config.max_tokens,
+                stop=["<|endoftext|>"],
+                extra_headers=_EXTRA_HEADERS,
+                stream=False,
+            )
+            reply = (response.choices[0].message.content or "").strip()
+        else:
+            chunks = await client.chat.completions.create(
+                model=thread_config.model,
+                messages=rendered,
+                temperature=thread_config.temperature,
+                top_p=1.0,
+                max_tokens=thread_config.max_tokens,
+                stop=["<|endoftext|>"],
+                extra_headers=_EXTRA_HEADERS,
+                stream=True,
+            )
+            # Show tokens as they arrive; the caller sends the final text via process_response.
+            # The text is only joined when an update is due, not on every delta.
+            parts = []
+            async for chunk in chunks:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    if stream.due:
+                        await stream.update("".join(parts).lstrip())
+            reply = "".join(parts).strip()
 
         # Note: API-based moderation is disabled for OpenRouter
         # OpenRouter applies native filtering on many models
@@ -191,7 +349,12 @@ async def generate_completion_response(
         )
 
 
-async def process_response(user: str, thread: discord.Thread, response_data: CompletionData):
+async def process_response(
+    user: str,
+    thread: discord.Thread,
+    response_data: CompletionData,
+    stream: Optional[StreamingReply] = None,
+):
     status = response_data.status
     reply_text = response_data.reply_text
     status_text = response_data.status_text
@@ -204,9 +367,11 @@ async def process_response(user: str, thread: discord.Thread, response_data: Com
                     color=discord.Color.yellow(),
                 )
             )
+        elif stream is not None:
+            # Edits the streamed messages into the final text (sends them on cache hits)
+            sent_message = await stream.finish(reply_text)
         else:
-            shorter_response = split_into_shorter_messages(reply_text)
-            for r in shorter_response:
+            for r in split_into_shorter_messages(reply_text):
                 sent_message = await thread.send(r)
         if status is CompletionResult.MODERATION_FLAGGED:
             await send_moderation_flagged_message(
@@ -6,7 +6,7 @@ import dacite
 import yaml
 from dotenv import load_dotenv
 
-from src.base import Config
+from src.base import Config, Settings
 from src.exceptions import ConfigError
 from src.utils import logger
 
@@ -35,9 +35,11 @@ def _get_int_env(key: str, default: int) -> int:
 SCRIPT_DIR: Final[Path] = Path(__file__).parent.resolve()
 CONFIG_PATH: Final[Path] = SCRIPT_DIR / "config.yaml"
 
+# libyaml-backed loader when PyYAML was built with it (same safe subset, parsed in C)
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 try:
-    with open(CONFIG_PATH, encoding="utf-8") as f:
-        config_data = yaml.safe_load(f)
+    config_data = yaml.load(CONFIG_PATH.read_text(encoding="utf-8"), Loader=_YAML_LOADER)
     CONFIG: Final[Config] = dacite.from_dict(Config, config_data)
 except Exception as e:
     raise ConfigError(f"Failed to load config.yaml: {e}") from e
@@ -58,21 +60,6 @@ def _get_float_env(key: str, default: float) -> float:
         return default
 
 
-# API Configuration
-OPENROUTER_API_KEY: Final[str] = get_env("OPENROUTER_API_KEY")
-OPENAI_API_KEY: Final[str | None] = get_env(
-    "OPENAI_API_KEY", required=False
-)  # Optional, strictly for embeddings if needed
-OPENROUTER_BASE_URL: Final[str] = get_env("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
-OPENROUTER_MAX_RETRIES: Final[int] = _get_int_env("OPENROUTER_MAX_RETRIES", 3)
-OPENROUTER_TIMEOUT: Final[float] = _get_float_env("OPENROUTER_TIMEOUT", 60.0)
-DEFAULT_MODEL: Final[str] = get_env("DEFAULT_MODEL")
-
-# Discord Configuration
-DISCORD_BOT_TOKEN: Final[str] = get_env("DISCORD_BOT_TOKEN")
-DISCORD_CLIENT_ID: Final[str] = get_env("DISCORD_CLIENT_ID")
-
-
 # Allowed Server IDs
 def _parse_allowed_servers() -> list[int]:
     raw = os.environ.get("ALLOWED_SERVER_IDS", "")
@@ -89,9 +76,6 @@ def _parse_allowed_servers() -> list[int]:
     return servers
 
 
-ALLOWED_SERVER_IDS: Final[list[int]] = _parse_allowed_servers()
-
-
 # Moderation Channel Mapping
 def _parse_moderation_channels() -> dict[int, int]:
     mapping: dict[int, int] = {}
@@ -110,7 +94,37 @@ def _parse_moderation_channels() -> dict[int, int]:
     return mapping
 
 
-SERVER_TO_MODERATION_CHANNEL: Final[dict[int, int]] = _parse_moderation_channels()
+# Env-derived runtime settings, read once; the module-level names below alias them
+SETTINGS: Final[Settings] = Settings(
+    allowed_server_ids=tuple(_parse_allowed_servers()),
+    moderation_channels=_parse_moderation_channels(),
+    openrouter_max_retries=_get_int_env("OPENROUTER_MAX_RETRIES", 3),
+    openrouter_timeout=_get_float_env("OPENROUTER_TIMEOUT", 60.0),
+    rag_prefetch_timeout=_get_float_env("RAG_PREFETCH_TIMEOUT", 3.0),
+    cache_max_size=_get_int_env("CACHE_MAX_SIZE", 100),
+    cache_ttl_seconds=_get_int_env("CACHE_TTL_SECONDS", 3600),
+)
+
+
+# API Configuration
+OPENROUTER_API_KEY: Final[str] = get_env("OPENROUTER_API_KEY")
+OPENAI_API_KEY: Final[str | None] = get_env(
+    "OPENAI_API_KEY", required=False
+)  # Optional, strictly for embeddings if needed
+OPENROUTER_BASE_URL: Final[str] = get_env("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+OPENROUTER_MAX_RETRIES: Final[int] = SETTINGS.openrouter_max_retries
+OPENROUTER_TIMEOUT: Final[float] = SETTINGS.openrouter_timeout
+DEFAULT_MODEL: Final[str] = get_env("DEFAULT_MODEL")
+
+# Discord Configuration
+DISCORD_BOT_TOKEN: Final[str] = get_env("DISCORD_BOT_TOKEN")
+DISCORD_CLIENT_ID: Final[str] = get_env("DISCORD_CLIENT_ID")
+
+ALLOWED_SERVER_IDS: Final[tuple[int, ...]] = SETTINGS.allowed_server_ids
+# O(1) lookup for should_block, which runs on every incoming message
+ALLOWED_SERVER_SET: Final[frozenset[int]] = frozenset(ALLOWED_SERVER_IDS)
+SERVER_TO_MODERATION_CHANNEL: Final[dict[int, int]] = SETTINGS.moderation_channels
+
 
 # Derived Constants
 # Discord permissions integer (admin, manage channels, send messages, etc.)
@@ -129,10 +143,14 @@ MAX_CHARS_PER_REPLY_MSG: Final[int] = 1500
 # Defaults for direct mentions
 DEFAULT_MENTION_MAX_TOKENS: Final[int] = 1024
 DEFAULT_MENTION_TEMPERATURE: Final[float] = 0.7
+# Max wait for a prefetched RAG lookup once the prompt is ready
+RAG_PREFETCH_TIMEOUT: Final[float] = SETTINGS.rag_prefetch_timeout
+# Min seconds between edits of a streamed reply (Discord allows ~5 edits / 5s)
+STREAM_EDIT_INTERVAL: Final[float] = 0.75
 
 # Cache Configuration
-CACHE_MAX_SIZE: Final[int] = _get_int_env("CACHE_MAX_SIZE", 100)
-CACHE_TTL_SECONDS: Final[int] = _get_int_env("CACHE_TTL_SECONDS", 3600)
+CACHE_MAX_SIZE: Final[int] = SETTINGS.cache_max_size
+CACHE_TTL_SECONDS: Final[int] = SETTINGS.cache_ttl_seconds
 
 # Available Models for runtime iteration and type hints
 MODELS_LIST: Final[tuple[str, ...]] = (
@@ -1,5 +1,10 @@
 import asyncio
+import json
 import os
+import struct
+import time
+from collections import OrderedDict
+from datetime import datetime
 from typing import Optional
 
 import asyncpg
@@ -8,9 +13,78 @@ from src.base import Message, ThreadConfig
 from src.utils import logger
 
 
+def _encode_vector(value) -> bytes:
+    """pgvector binary format: uint16 dim, uint16 unused, dim x float4 (big-endian)."""
+    if isinstance(value, str):
+        # Text literal "[0.1, 0.2, ...]" from older call sites
+        value = json.loads(value)
+    return struct.pack(f">HH{len(value)}f", len(value), 0, *value)
+
+
+def _decode_vector(data: bytes) -> list[float]:
+    dim, _ = struct.unpack_from(">HH", data)
+    return list(struct.unpack_from(f">{dim}f", data, 4))
+
+
+def _encode_jsonb(value) -> bytes:
+    """jsonb binary format: version byte (1) followed by the JSON text."""
+    # str values are already-serialized JSON (older call sites pass json.dumps output).
+    # default=str: a value JSON can't represent (e.g. a date in ingestion metadata) is
+    # stored as its text instead of failing the whole COPY
+    text: str = value if isinstance(value, str) else json.dumps(value, default=str)
+    return b"\x01" + text.encode("utf-8")
+
+
+def _decode_jsonb(data: bytes):
+    return json.loads(data[1:])
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    """Per-connection setup: binary codecs for jsonb (rows come back as dicts) and
+    pgvector (needed by COPY in the RAG path)."""
+    await conn.set_type_codec(
+        "jsonb",
+        schema="pg_catalog",
+        encoder=_encode_jsonb,
+        decoder=_decode_jsonb,
+        format="binary",
+    )
+    # pgvector may live in any schema (CREATE EXTENSION vector SCHEMA ...); a database
+    # without it (e.g. bot-only schema) just gets no codec. Other errors propagate.
+    vector_schema = await conn.fetchval(
+        """
+        SELECT n.nspname
+        FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace
+        WHERE t.typname = 'vector'
+        ORDER BY pg_type_is_visible(t.oid) DESC
+        LIMIT 1
+        """
+    )
+    if vector_schema is not None:
+        await conn.set_type_codec(
+            "vector",
+            schema=vector_schema,
+            encoder=_encode_vector,
+            decoder=_decode_vector,
+            format="binary",
+        )
+
+
+# Thread configs kept in memory (one per active thread; LRU beyond this)
+_CONFIG_CACHE_SIZE = 1024
+# Bounds staleness for changes made outside this process (manual edits, another instance)
+_CONFIG_CACHE_TTL = float(os.environ.get("THREAD_CONFIG_CACHE_TTL", "300"))
+
+
 class DatabaseService:
     def __init__(self):
-        self.dsn = os.environ.get("DATABASE_URL")
+        # DB_POOL_DSN (e.g. a pooled/PgBouncer endpoint) takes precedence when set
+        self.dsn = os.environ.get("DB_POOL_DSN") or os.environ.get("DATABASE_URL")
+        self.pool_min_size = int(os.environ.get("DB_POOL_MIN", "1"))
+        self.pool_max_size = int(os.environ.get("DB_POOL_MAX", "20"))
+        # JIT compilation only adds latency to these short queries. Sent as a startup
+        # parameter, which PgBouncer-style poolers reject, so direct connections only.
+        self._server_settings = None if os.environ.get("DB_POOL_DSN") else {"jit": "off"}
         if not self.dsn:
             logger.error("❌ DATABASE_URL is not set in environment")
             # We don't raise here to allow the bot to start if DB is optional,
@@ -20,9 +94,21 @@ class DatabaseService:
 
         self.pool: Optional[asyncpg.Pool] = None
         self._connect_lock = asyncio.Lock()
+        # thread_id -> (expires_at, ThreadConfig); refreshed by save_thread/get_thread_config
+        self._config_cache: OrderedDict[int, tuple[float, ThreadConfig]] = OrderedDict()
 
-    async def connect(self):
-        """Establish connection pool if not already connected."""
+    def _cache_config(self, thread_id: int, config: ThreadConfig) -> None:
+        self._config_cache[thread_id] = (time.monotonic() + _CONFIG_CACHE_TTL, config)
+        self._config_cache.move_to_end(thread_id)
+        if len(self._config_cache) > _CONFIG_CACHE_SIZE:
+            self._config_cache.popitem(last=False)
+
+    async def connect(self, min_size: Optional[int] = None, max_size: Optional[int] = None):
+        """Establish connection pool if not already connected.
+
+        min_size/max_size override the bot defaults (DB_POOL_MIN/DB_POOL_MAX, 1/20);
+        short-lived CLI scripts use a smaller pool. Ignored if the pool already exists.
+        """
         if self.pool:
             return
 
@@ -32,10 +118,15 @@ class DatabaseService:
                 try:
                     self.pool = await asyncpg.create_pool(
                         self.dsn,
-                        min_size=1,  # Keep at least one connection warm
-                        max_size=5,  # Limit max connections to share resources
+                        min_size=self.pool_min_size if min_size is None else min_size,
+                        # Chat, log writer and RAG searches run concurrently under bursts
+                        max_size=self.pool_max_size if max_size is None else max_size,
                         command_timeout=30,  # Fail fast if DB is sleeping/cold
+                        statement_cache_size=1024,  # Keep repeated queries prepared
+                        max_cached_statement_lifetime=0,  # Same few statements for the pool's life
+                        server_settings=self._server_settings,
                         max_inactive_connection_lifetime=300,  # Recycle connections commonly
+                        init=_init_connection,
                     )
                     logger.info("✅ Connected to Neon Database pool")
                 except Exception as e:
@@ -45,14 +136,57 @@ class DatabaseService:
     async def close(self):
         """Close the database pool."""
         async with self._connect_lock:
-            if self.pool:
-                await self.pool.close()
-                self.pool = None
+            pool, self.pool = self.pool, None
+            # Unpublished before awaiting: the lock-free `if self.pool` fast path in
+            # connect() must not hand out a pool that is shutting down
+            if pool:
+                await pool.close()
                 logger.info("🔌 Database pool closed")
 
-    async def save_thread(self, thread_id: int, guild_id: int, user_id: int, config: ThreadConfig):
+    async def save_thread(
+        self, thread_id: int, guild_id: int, user_id: int, config: ThreadConfig
+    ) -> ThreadConfig:
+        """Upsert the thread config and return the stored row (single round-trip)."""
         await self.connect()
         async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                INSERT INTO threads (thread_id, guild_id, user_id, model, temperature, max_tokens)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                ON CONFLICT (thread_id) DO UPDATE SET
+                    model = EXCLUDED.model,
+                    temperature = EXCLUDED.temperature,
+                    max_tokens = EXCLUDED.max_tokens,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING model, temperature, max_tokens
+                """,
+                thread_id,
+                guild_id,
+                user_id,
+                config.model,
+                config.temperature,
+                config.max_tokens,
+            )
+            saved = ThreadConfig(
+                model=row["model"], temperature=row["temperature"], max_tokens=row["max_tokens"]
+            )
+        self._cache_config(thread_id, saved)
+        return saved
+
+    async def save_thread_and_log(
+        self,
+        thread_id: int,
+        guild_id: int,
+        user_id: int,
+        config: ThreadConfig,
+        role: str,
+        content: str,
+        tokens: int = 0,
+        author: Optional[str] = None,
+    ):
+        """Upsert the thread and log a message in one transaction (one pool checkout)."""
+        await self.connect()
+        async with self.pool.acquire() as conn, conn.transaction():
             await conn.execute(
                 """
                 INSERT INTO threads (thread_id, guild_id, user_id, model, temperature, max_tokens)
@@ -70,29 +204,59 @@ class DatabaseService:
                 config.temperature,
                 config.max_tokens,
             )
+            await conn.execute(
+                "INSERT INTO messages (thread_id, role, content, token_count, author) "
+                "VALUES ($1, $2, $3, $4, $5)",
+                thread_id,
+                role,
+                content,
+                tokens,
+                author,
+            )
+        # Re-read on next access: the stored row may differ (e.g. float precision)
+        self._config_cache.pop(thread_id, None)
 
     async def get_thread_config(self, thread_id: int) -> Optional[ThreadConfig]:
+        cached = self._config_cache.get(thread_id)
+        if cached is not None:
+            expires_at, config = cached
+            if time.monotonic() < expires_at:
+                self._config_cache.move_to_end(thread_id)
+                return config
+            del self._config_cache[thread_id]
+
         await self.connect()
         async with self.pool.acquire() as conn:
             row = await conn.fetchrow(
                 "SELECT model, temperature, max_tokens FROM threads WHERE thread_id = $1 AND is_active = TRUE",
                 thread_id,
             )
-            if row:
-                return ThreadConfig(
-                    model=row["model"], temperature=row["temperature"], max_tokens=row["max_tokens"]
-                )
-            return None
+        if row:
+            config = ThreadConfig(
+                model=row["model"], temperature=row["temperature"], max_tokens=row["max_tokens"]
+            )
+            self._cache_config(thread_id, config)
+            return config
+        return None
 
-    async def log_message(self, thread_id: int, role: str, content: str, tokens: int = 0):
+    async def log_message(
+        self,
+        thread_id: int,
+        role: str,
+        content: str,
+        tokens: int = 0,
+        author: Optional[str] = None,
+    ):
         await self.connect()
         async with self.pool.acquire() as conn:
             await conn.execute(
-                "INSERT INTO messages (thread_id, role, content, token_count) VALUES ($1, $2, $3, $4)",
+                "INSERT INTO messages (thread_id, role, content, token_count, author) "
+                "VALUES ($1, $2, $3, $4, $5)",
                 thread_id,
                 role,
                 content,
                 tokens,
+                author,
             )
 
     async def log_analytics(
@@ -123,28 +287,57 @@ class DatabaseService:
 
     async def get_messages(self, thread_id: int, limit: int = 10) -> list[Message]:
         """Fetch chronologically ordered history for a thread/channel (last N messages)."""
+        messages, _ = await self.get_messages_page(thread_id, limit)
+        return messages
+
+    async def get_messages_page(
+        self, thread_id: int, limit: int = 10, before: Optional[tuple[datetime, int]] = None
+    ) -> tuple[list[Message], Optional[tuple[datetime, int]]]:
+        """Keyset page of a thread's history: the last `limit` messages older than `before`.
+
+        Each message is attributed to its stored author, falling back to the role
+        (e.g. "assistant"). Returns the messages in chronological order and the cursor for the next
+        (older) page, i.e. the (created_at, id) of the oldest row returned (None when
+        empty). The id breaks ties between rows with the same timestamp (batched
+        inserts share one), so none are skipped at a page boundary. Each page is one
+        range scan of idx_messages_thread_created_id, whatever the thread's size.
+        """
         # Proper clamping: min 1, max 100
         limit = max(1, min(limit, 100))
 
         await self.connect()
         async with self.pool.acquire() as conn:
-            # Fetch last N messages (DESC limit), then order them chronologically (ASC)
-            rows = await conn.fetch(
-                """
-                SELECT role, content
-                FROM (
-                    SELECT role, content, created_at
+            # Newest first straight off the index; reversed to chronological order below
+            if before is None:
+                rows = await conn.fetch(
+                    """
+                    SELECT role, content, created_at, id, author
                     FROM messages
                     WHERE thread_id = $1
-                    ORDER BY created_at DESC
+                    ORDER BY created_at DESC, id DESC
                     LIMIT $2
-                ) AS sub
-                ORDER BY created_at ASC
-                """,
-                thread_id,
-                limit,
-            )
-            return [Message(user=row["role"], text=row["content"]) for row in rows]
+                    """,
+                    thread_id,
+                    limit,
+                )
+            else:
+                rows = await conn.fetch(
+                    """
+                    SELECT role, content, created_at, id, author
+                    FROM messages
+                    WHERE thread_id = $1 AND (created_at, id) < ($3, $4)
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT $2
+                    """,
+                    thread_id,
+                    limit,
+                    *before,
+                )
+
+        # Positional Record access (role, content, created_at, id, author): no per-row key lookup
+        messages = [Message(user=row[4] or row[0], text=row[1]) for row in reversed(rows)]
+        cursor = (rows[-1][2], rows[-1][3]) if rows else None
+        return messages, cursor
 
     async def get_analytics_count(self, thread_id: int) -> int:
         """Get the count of analytics entries for a thread (for testing)."""
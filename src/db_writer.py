@@ -0,0 +1,147 @@
+"""Background batching writer for message logs.
+
+Chat handlers enqueue log rows without awaiting the database; a single
+consumer task drains the queue and inserts up to `batch_size` rows per
+transaction, waiting at most `max_delay_ms` for a batch to fill.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+from typing import Optional
+
+from src.database import DatabaseService, db_service
+
+logger = logging.getLogger(__name__)
+
+# created_at comes from the column default, the same DB clock every other insert uses;
+# rows of one batch share it and keep their queue order through the id tie-break
+_INSERT_MESSAGE = (
+    "INSERT INTO messages (thread_id, role, content, token_count, author) "
+    "VALUES ($1, $2, $3, $4, $5)"
+)
+
+
+class MessageLogWriter:
+    """Agrupa inserts de mensagens em lotes escritos por uma task em background.
+
+    Args:
+        db: Serviço de banco usado para as escritas
+        batch_size: Máximo de linhas por transação
+        max_delay_ms: Espera máxima para completar um lote antes de gravá-lo
+    """
+
+    def __init__(self, db: DatabaseService, batch_size: int = 64, max_delay_ms: int = 50):
+        self.db = db
+        self.batch_size = batch_size
+        self.max_delay = max_delay_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        # Rows still queued or being written per thread, and who waits for them to land
+        self._pending: dict[int, int] = {}
+        self._waiters: dict[int, list[asyncio.Future]] = {}
+
+    def start(self) -> None:
+        """Start the consumer task (idempotent). Requires a running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def log_message(
+        self,
+        thread_id: int,
+        role: str,
+        content: str,
+        tokens: int = 0,
+        author: Optional[str] = None,
+    ) -> None:
+        """Enqueue a message row; returns immediately."""
+        self.start()
+        self._pending[thread_id] = self._pending.get(thread_id, 0) + 1
+        self._queue.put_nowait((thread_id, role, content, tokens, author))
+
+    async def flush(self) -> None:
+        """Wait until every enqueued row has been written."""
+        if self._task is not None:
+            await self._queue.join()
+
+    async def flush_thread(self, thread_id: int) -> None:
+        """Wait until no rows of `thread_id` are left to write.
+
+        Unlike flush(), rows queued for other threads are not waited for.
+        """
+        if not self._pending.get(thread_id):
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(thread_id, []).append(waiter)
+        await waiter
+
+    def _row_done(self, thread_id: int) -> None:
+        remaining = self._pending.get(thread_id, 0) - 1
+        if remaining > 0:
+            self._pending[thread_id] = remaining
+            return
+        self._pending.pop(thread_id, None)
+        for waiter in self._waiters.pop(thread_id, ()):
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def close(self) -> None:
+        """Flush pending rows and stop the consumer task."""
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._write(batch)
+            finally:
+                for row in batch:
+                    self._queue.task_done()
+                    self._row_done(row[0])
+
+    async def _write(self, batch: list[tuple]) -> None:
+        try:
+            await self.db.connect()
+            async with self.db.pool.acquire() as conn, conn.transaction():
+                await conn.executemany(_INSERT_MESSAGE, batch)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error("❌ Failed to log message for thread %s: %s", batch[0][0], e)
+                return
+            logger.warning(
+                "⚠️ Batch log of %d messages failed, retrying row by row: %s", len(batch), e
+            )
+
+        # One bad row (e.g. unknown thread) must not drop the rest of the batch
+        for row in batch:
+            try:
+                async with self.db.pool.acquire() as conn:
+                    await conn.execute(_INSERT_MESSAGE, *row)
+            except Exception as e:
+                logger.error("❌ Failed to log message for thread %s: %s", row[0], e)
+
+
+# Global instance, started by the bot's setup_hook
+message_log_writer = MessageLogWriter(
+    db_service,
+    batch_size=int(os.environ.get("MSG_BATCH_SIZE", "64")),
+    max_delay_ms=int(os.environ.get("MSG_FLUSH_MS", "50")),
+)
@@ -0,0 +1,126 @@
+"""Persistent embedding cache keyed by content hash (SQLite).
+
+Avoids re-embedding identical chunks across ingestion runs: each vector is
+stored under blake2b(model + text), so re-running a script over the same
+documents only pays the embedding API for new or changed chunks.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Cache persistente de embeddings em SQLite.
+
+    Args:
+        path: Caminho do arquivo SQLite. Vazio/None desativa o cache.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path or None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    @staticmethod
+    def _hash_key(model: str, text: str) -> bytes:
+        return hashlib.blake2b(f"{model}\0{text}".encode(), digest_size=16).digest()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        # Called with self._lock held
+        if self._conn is None and self.path:
+            try:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embed_cache (hash BLOB PRIMARY KEY, vector BLOB)"
+                )
+                self._conn = conn
+            except (OSError, sqlite3.Error) as e:
+                # Read-only filesystem, locked file, etc.: run without the cache
+                logger.warning("⚠️ Embedding cache disabled (%s): %s", self.path, e)
+                self.path = None
+        return self._conn
+
+    def get_many(self, model: str, texts: Sequence[str]) -> dict[int, list[float]]:
+        """Returns {index: vector} for the texts already cached."""
+        if not self.enabled or not texts:
+            return {}
+
+        keys = [self._hash_key(model, text) for text in texts]
+        found: dict[bytes, list[float]] = {}
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return {}
+            try:
+                # Stay well below SQLite's bound-parameter limit
+                for start in range(0, len(keys), 500):
+                    batch = keys[start : start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = conn.execute(
+                        f"SELECT hash, vector FROM embed_cache WHERE hash IN ({placeholders})",
+                        batch,
+                    )
+                    for key, blob in rows:
+                        found[key] = array("f", blob).tolist()
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Embedding cache read failed: %s", e)
+                return {}
+
+            result = {i: found[key] for i, key in enumerate(keys) if key in found}
+            self._stats["hits"] += len(result)
+            self._stats["misses"] += len(keys) - len(result)
+            return result
+
+    def set_many(self, model: str, texts: Sequence[str], vectors: Sequence[list[float]]) -> None:
+        """Stores vectors for the given texts (float32, same precision as pgvector)."""
+        if not self.enabled or not texts:
+            return
+
+        rows = [
+            (self._hash_key(model, text), array("f", vector).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embed_cache (hash, vector) VALUES (?, ?)", rows
+                    )
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Embedding cache write failed: %s", e)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @property
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+# Global instance (EMBEDDING_CACHE_PATH="" disables it)
+embedding_cache = EmbeddingCache(
+    os.environ.get("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+)
@@ -1,12 +1,14 @@
 import asyncio
 import logging
+import sys
 from pathlib import Path
 
 import discord
 from discord.ext import commands
 
-from src.base import Conversation, Message
+from src.base import Conversation
 from src.cogs.chat import ChatCog
+from src.completion import examples_with_bot_name
 from src.constants import (
     ALLOWED_SERVER_IDS,
     BOT_INVITE_URL,
@@ -15,8 +17,14 @@ from src.constants import (
     EXAMPLE_CONVOS,
 )
 from src.database import db_service
+from src.db_writer import message_log_writer
 from src.utils import logger
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None  # type: ignore
+
 logging.basicConfig(
     format="[%(asctime)s] [%(filename)s:%(lineno)d] %(levelname)s: %(message)s", level=logging.INFO
 )
@@ -33,6 +41,9 @@ class SherlockRamosBot(commands.Bot):
         intents.message_content = True
         super().__init__(command_prefix="!", intents=intents)
         self.db_service = db_service
+        self.log_writer = message_log_writer
+        # Config examples until on_ready knows the bot's Discord username
+        self._example_conversations: list[Conversation] = EXAMPLE_CONVOS
 
     @property
     def bot_name(self) -> str:
@@ -41,46 +52,34 @@ class SherlockRamosBot(commands.Bot):
 
     @property
     def example_conversations(self) -> list[Conversation]:
-        """Get example conversations with the actual bot name injected."""
-        if not self.user:
-            return EXAMPLE_CONVOS
-
-        # Cache the processed conversations to avoid rebuilding them
-        if (
-            hasattr(self, "_cached_examples")
-            and getattr(self, "_cached_user", None) == self.user.id
-        ):
-            return self._cached_examples
-
-        processed = [
-            Conversation(
-                messages=[
-                    Message(user=self.user.name, text=msg.text) if msg.user == BOT_NAME else msg
-                    for msg in convo.messages
-                ]
-            )
-            for convo in EXAMPLE_CONVOS
-        ]
-        self._cached_examples = processed
-        self._cached_user = self.user.id
-        return processed
+        """Get example conversations with the actual bot name injected (built in on_ready)."""
+        return self._example_conversations
 
     async def setup_hook(self) -> None:
         """Load cogs and sync application commands."""
-        await self.add_cog(ChatCog(self, self.db_service))
-
-        for guild_id in ALLOWED_SERVER_IDS:
-            guild = discord.Object(id=guild_id)
-            self.tree.copy_global_to(guild=guild)
-            try:
-                synced = await self.tree.sync(guild=guild)
-                logger.info("Synced %d commands to guild %d", len(synced), guild_id)
-            except Exception as exc:
-                logger.error("Failed to sync commands to guild %d: %s", guild_id, exc)
-
-        await self.tree.sync()
+        # Open the pool before any event arrives (fails fast on a bad DSN); later
+        # connect() calls in the DB methods return on the `if self.pool` fast path
+        await self.db_service.connect()
+        self.log_writer.start()
+        await self.add_cog(ChatCog(self, self.db_service, self.log_writer))
+
+        # One API round-trip per guild: run them concurrently with the global sync
+        await asyncio.gather(
+            *(self._sync_guild(guild_id) for guild_id in ALLOWED_SERVER_IDS),
+            self.tree.sync(),
+        )
         logger.info("Global command sync complete")
 
+    async def _sync_guild(self, guild_id: int) -> None:
+        """Copy global commands to a guild and sync them; failures are logged, not raised."""
+        guild = discord.Object(id=guild_id)
+        self.tree.copy_global_to(guild=guild)
+        try:
+            synced = await self.tree.sync(guild=guild)
+            logger.info("Synced %d commands to guild %d", len(synced), guild_id)
+        except Exception as exc:
+            logger.error("Failed to sync commands to guild %d: %s", guild_id, exc)
+
     async def _heartbeat(self) -> None:
         sentinel_path = Path("/tmp/bot_healthy")
         while True:
@@ -95,6 +94,8 @@ class SherlockRamosBot(commands.Bot):
         if self.user is None:
             return
 
+        # The username is stable for the session: rename the examples once here
+        self._example_conversations = examples_with_bot_name(self.user.name, EXAMPLE_CONVOS)
         asyncio.create_task(self._heartbeat())
 
         logger.info("We have logged in as %s. Invite URL: %s", self.user, BOT_INVITE_URL)
@@ -107,11 +108,24 @@ class SherlockRamosBot(commands.Bot):
         from src.profiling import log_metrics_summary_sync
 
         log_metrics_summary_sync()
+        # Write any buffered message logs before disconnecting
+        await self.log_writer.close()
+        await self.db_service.close()
+        # Close pooled HTTP connections (OpenRouter, embeddings)
+        from src.completion import client
+        from src.rag_service import rag_service
+
+        await client.close()
+        if rag_service.embedding_service.client is not None:
+            await rag_service.embedding_service.client.close()
         await super().close()
 
 
 def run() -> None:
     """Entry point for the bot."""
+    if uvloop is not None and sys.platform != "win32":
+        # libuv-based loop: cheaper awaits and socket I/O for Discord + OpenRouter traffic
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     bot = SherlockRamosBot()
     bot.run(DISCORD_BOT_TOKEN)
 
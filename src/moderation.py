@@ -6,6 +6,9 @@ from src.constants import (
     SERVER_TO_MODERATION_CHANNEL,
 )
 
+# Channels that had to be fetched over REST (not in the gateway cache); IDs are stable
+_fetched_channels: dict[int, discord.abc.GuildChannel] = {}
+
 
 def moderate_message(message: str, user: str) -> tuple[str, str]:  # [flagged_str, blocked_str]
     # Moderação desativada: OpenRouter não possui endpoint /moderations
@@ -21,7 +24,11 @@ async def fetch_moderation_channel(
         return None
     moderation_channel = SERVER_TO_MODERATION_CHANNEL.get(guild.id, None)
     if moderation_channel:
-        channel = await guild.fetch_channel(moderation_channel)
+        # Gateway cache first; the REST fetch is only needed for uncached channels
+        channel = guild.get_channel(moderation_channel) or _fetched_channels.get(moderation_channel)
+        if channel is None:
+            channel = await guild.fetch_channel(moderation_channel)
+            _fetched_channels[moderation_channel] = channel
         return channel
     return None
 
@@ -4,14 +4,13 @@ Provides decorators and utilities for measuring execution time and
 collecting performance metrics.
 """
 
-import asyncio
 import functools
 import logging
 import threading
 import time
 from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Any, Callable, Optional, TypeVar
+from typing import Any, Callable, TypeVar
 
 logger = logging.getLogger(__name__)
 
@@ -42,18 +41,11 @@ class PerformanceMetrics:
 
 # Global registry for metrics
 _metrics: dict[str, PerformanceMetrics] = defaultdict(PerformanceMetrics)
-_metrics_lock: Optional[asyncio.Lock] = None
+# Critical sections never await, so a plain (uncontended: ~tens of ns) threading lock
+# is enough for both event-loop code and timed_sync functions run in worker threads
 _metrics_sync_lock = threading.Lock()
 
 
-def _get_metrics_lock() -> asyncio.Lock:
-    """Lazy initialization of the asyncio lock to ensure it's in the correct event loop."""
-    global _metrics_lock
-    if _metrics_lock is None:
-        _metrics_lock = asyncio.Lock()
-    return _metrics_lock
-
-
 def timed(func: F) -> F:
     """Decorator that measures execution time of async functions.
 
@@ -70,11 +62,8 @@ def timed(func: F) -> F:
             return await func(*args, **kwargs)
         finally:
             elapsed_ms = (time.perf_counter() - start) * 1000
-            async with _get_metrics_lock():
-                # Also acquire sync lock for cross-context safety
-                with _metrics_sync_lock:
-                    metrics = _metrics[func.__qualname__]
-                    metrics.record(elapsed_ms)
+            with _metrics_sync_lock:
+                _metrics[func.__qualname__].record(elapsed_ms)
             logger.debug("⏱️ %s completed in %.2fms", func.__qualname__, elapsed_ms)
 
     return wrapper  # type: ignore[return-value]
@@ -125,19 +114,16 @@ async def get_metrics_summary() -> dict[str, dict[str, Any]]:
     Returns:
         Dict with metrics per function: calls, avg_ms, min_ms, max_ms
     """
-    async with _get_metrics_lock():
-        with _metrics_sync_lock:
-            # Create a copy to avoid concurrency issues during iteration
-            metrics_copy = dict(_metrics)
-
-    return _build_metrics_summary(metrics_copy)
+    # Snapshot under the lock (pure CPU, no awaits), so each entry's counters are
+    # consistent with each other; callers log/print after the lock is released
+    with _metrics_sync_lock:
+        return _build_metrics_summary(_metrics)
 
 
 async def reset_metrics() -> None:
     """Resets all collected metrics."""
-    async with _get_metrics_lock():
-        with _metrics_sync_lock:
-            _metrics.clear()
+    with _metrics_sync_lock:
+        _metrics.clear()
 
 
 def _format_metric_line(name: str, data: dict[str, Any]) -> str:
@@ -165,10 +151,7 @@ async def log_metrics_summary() -> None:
 def log_metrics_summary_sync() -> None:
     """Logs a summary of collected metrics synchronously for atexit/signals."""
     with _metrics_sync_lock:
-        # Create a copy to avoid concurrency issues during iteration
-        metrics_copy = dict(_metrics)
-
-    summary = _build_metrics_summary(metrics_copy)
+        summary = _build_metrics_summary(_metrics)
 
     if not summary:
         print("📊 No performance metrics collected yet (sync).")
@@ -1,13 +1,146 @@
+import asyncio
+import functools
 import json
 import os
+import re
+import time
+from collections import OrderedDict
 from typing import Optional
 
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 
 from src.database import db_service
+from src.embedding_cache import embedding_cache
+from src.semantic_cache import SemanticCache
 from src.utils import logger
 
+try:
+    import h2  # noqa: F401
+
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# Text search configurations accepted for TEXT_SEARCH_LANG (interpolated into the SQL)
+_TEXT_SEARCH_LANGUAGES = frozenset(
+    {
+        "portuguese",
+        "english",
+        "spanish",
+        "french",
+        "german",
+        "italian",
+        "dutch",
+        "russian",
+        "simple",
+    }
+)
+
+
+# Reciprocal Rank Fusion constant: score = sum(1 / (k + rank)) over both legs
+_RRF_K = 60
+
+_DIGITS_RE = re.compile(r"\d+")
+
+
+# Metadata keys ingest_docs stores as JSON numbers; every other key is stored as a string
+_INT_METADATA_KEYS = frozenset({"year", "chunk_index"})
+
+
+def _normalize_filter(filter_metadata: dict) -> dict:
+    """Filter values in the JSON type ingestion stores for each key.
+
+    jsonb containment is type-sensitive ({"year": "1993"} does not match a stored 1993),
+    while callers used to get a text comparison; converting keeps both spellings working.
+    """
+    normalized = {}
+    for key, value in filter_metadata.items():
+        if key in _INT_METADATA_KEYS and isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        elif key not in _INT_METADATA_KEYS and not isinstance(value, str):
+            value = str(value)
+        normalized[key] = value
+    return normalized
+
+
+def _query_cache_guard(query_text: str) -> tuple[str, ...]:
+    """Numbers of a query, which must match for a semantic cache hit.
+
+    "Súmula 473" and "Súmula 474" embed almost identically but cite different texts.
+    """
+    return tuple(_DIGITS_RE.findall(query_text))
+
+
+@functools.lru_cache(maxsize=16)
+def _hybrid_search_sql(text_search_lang: str, with_content: bool, with_filter: bool) -> str:
+    """SQL for the fused hybrid search, built once per variant.
+
+    The text is byte-identical across calls of the same variant, so asyncpg's
+    per-connection statement cache (statement_cache_size) reuses the prepared
+    statement instead of parsing and planning it on every search.
+    """
+    # Containment (metadata @> '{...}') is served by the jsonb_path_ops GIN index,
+    # unlike metadata->>'key' = ... which forces a scan. Keys/values travel as a
+    # single JSON parameter, so nothing is interpolated into the SQL.
+    # $1..$4 are reserved for embedding, query text and the two limits
+    filter_clause = "AND metadata @> $5::jsonb" if with_filter else ""
+    # Counting callers skip the content column (no chunk text over the wire)
+    content_join = "JOIN documents d USING (id)" if with_content else ""
+    columns = "id, d.content" if with_content else "id"
+
+    # Vector and keyword (full text) legs ranked and fused with RRF in the database:
+    # only the final top-N rows come back. Ties keep vector order first, then
+    # keyword-only hits, as the old Python merge did.
+    # Params: $1=embedding, $2=query, $3=limit per leg, $4=n_results, $5=filter
+    return f"""
+        WITH vec AS (
+            SELECT id, row_number() OVER (ORDER BY distance) AS rank
+            FROM (
+                SELECT id, embedding <=> $1::vector AS distance
+                FROM documents
+                WHERE 1=1 {filter_clause}
+                ORDER BY distance
+                LIMIT $3
+            ) AS v
+        ), kw AS (
+            SELECT id, row_number() OVER (ORDER BY score DESC) AS rank
+            FROM (
+                SELECT id,
+                    ts_rank(content_search, websearch_to_tsquery('{text_search_lang}', $2))
+                        AS score
+                FROM documents
+                WHERE content_search @@ websearch_to_tsquery('{text_search_lang}', $2)
+                {filter_clause}
+                ORDER BY score DESC
+                LIMIT $3
+            ) AS k
+        ), fused AS (
+            SELECT id,
+                SUM(1.0::float8 / ({_RRF_K} + rank)) AS score,
+                MIN(CASE WHEN source = 'vector' THEN rank ELSE $3 + rank END) AS first_seen
+            FROM (
+                SELECT id, rank, 'vector' AS source FROM vec
+                UNION ALL
+                SELECT id, rank, 'keyword' FROM kw
+            ) AS legs
+            GROUP BY id
+            ORDER BY score DESC, first_seen
+            LIMIT $4
+        )
+        SELECT {columns}
+        FROM fused {content_join}
+        ORDER BY fused.score DESC, fused.first_seen
+    """
+
+
+# get_stats reuses the last COUNT(*) for this long (add_documents resets it)
+_STATS_TTL_SECONDS = 30.0
+
+# Recent query texts -> vector; a repeated question (or count_matches + query on the
+# same text) is embedded once per process
+_QUERY_EMBEDDING_CACHE_SIZE = 512
+
 
 # Helper class to manage embeddings
 class EmbeddingService:
@@ -17,11 +150,17 @@ class EmbeddingService:
             logger.warning("OPENAI_API_KEY not found. RAG functionality will be disabled.")
             self.client = None
         else:
-            self.client = AsyncOpenAI(api_key=self.api_key)
+            # Long-lived pooled client: concurrent embedding batches share one HTTP/2 connection
+            self.client = AsyncOpenAI(
+                api_key=self.api_key, http_client=DefaultAsyncHttpxClient(http2=_HTTP2)
+            )
 
         # OpenRouter might not support embeddings strictly, best to use direct OpenAI or compatible
         # If the user wants to use another provider, they can change the base_url here.
         self.model = os.environ.get("EMBEDDING_MODEL", "text-embedding-3-small")
+        self._query_embeddings: OrderedDict[str, list[float]] = OrderedDict()
+        # Normalized query text -> in-flight embedding task (singleflight)
+        self._in_flight: dict[str, asyncio.Task] = {}
 
     @retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(3))
     async def get_embeddings(self, texts: list[str]) -> list[list[float]]:
@@ -38,22 +177,100 @@ class EmbeddingService:
             logger.error("Failed to generate embeddings batch: %s", str(e))
             raise e
 
+    async def embed_documents(
+        self, texts: list[str], batch_size: Optional[int] = None
+    ) -> list[list[float]]:
+        """Batch embeddings backed by the persistent content-hash cache.
+
+        Only cache misses hit the API (identical texts are embedded once), in calls
+        of at most `batch_size` texts; new vectors are persisted for the next run.
+        """
+        cached = await asyncio.to_thread(embedding_cache.get_many, self.model, texts)
+
+        # Unique texts still missing, in first-seen order
+        missing = list(dict.fromkeys(text for i, text in enumerate(texts) if i not in cached))
+        fresh: dict[str, list[float]] = {}
+        if missing:
+            step = batch_size or len(missing)
+            for start in range(0, len(missing), step):
+                batch = missing[start : start + step]
+                vectors = await self.get_embeddings(batch)
+                if len(vectors) != len(batch):
+                    raise RuntimeError("Mismatch in embedding count")
+                fresh.update(zip(batch, vectors))
+            await asyncio.to_thread(
+                embedding_cache.set_many, self.model, list(fresh), list(fresh.values())
+            )
+
+        return [cached[i] if i in cached else fresh[text] for i, text in enumerate(texts)]
+
     async def get_embedding(self, text: str) -> Optional[list[float]]:
-        # Wrapper for single text backward compatibility if needed, using the batch method
+        # Same normalization as get_embeddings, so "a\nb" and "a b" share an entry
+        key = text.replace("\n", " ")
+        cached = self._query_embeddings.get(key)
+        if cached is not None:
+            self._query_embeddings.move_to_end(key)
+            return cached
+
+        # Concurrent callers with the same text (a burst of identical questions, or
+        # count_matches + query) share one API call. Shielded so a cancelled caller
+        # doesn't cancel it for the others.
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_query_embedding(text, key))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch_query_embedding(self, text: str, key: str) -> Optional[list[float]]:
+        # Through the persistent cache too, so warm queries survive restarts
         try:
-            embs = await self.get_embeddings([text])
-            return embs[0] if embs else None
+            embs = await self.embed_documents([text])
         except Exception as e:
             logger.error("Failed to generate single embedding: %s", str(e))
             return None
+        if not embs:
+            return None
+
+        self._query_embeddings[key] = embs[0]
+        if len(self._query_embeddings) > _QUERY_EMBEDDING_CACHE_SIZE:
+            self._query_embeddings.popitem(last=False)
+        return embs[0]
 
 
 class RAGService:
     def __init__(self):
         self.embedding_service = EmbeddingService()
+        # Near-duplicate questions ("o que é X?" / "o que seria X") reuse the last search;
+        # the numbers in the query must match exactly (see _query_cache_guard)
+        self.query_cache = SemanticCache(
+            max_size=int(os.environ.get("RAG_QUERY_CACHE_SIZE", "256")),
+            max_distance=float(os.environ.get("RAG_QUERY_CACHE_DISTANCE", "0.05")),
+            ttl_seconds=int(os.environ.get("RAG_QUERY_CACHE_TTL", "600")),
+        )
+        self._in_flight: dict[tuple, asyncio.Task] = {}
+        self._stats_cache: Optional[tuple[float, dict]] = None
+        # Text search language configuration, validated once (it goes into the SQL text)
+        text_search_lang = os.environ.get("TEXT_SEARCH_LANG", "portuguese").lower()
+        if text_search_lang not in _TEXT_SEARCH_LANGUAGES:
+            text_search_lang = "portuguese"
+        self.text_search_lang = text_search_lang
+
+    async def add_documents(
+        self,
+        documents: list[str],
+        metadatas: list[dict],
+        embed_batch_size: Optional[int] = None,
+        upsert_batch_size: Optional[int] = None,
+    ) -> bool:
+        """Add documents to the Neon/Postgres vector store.
 
-    async def add_documents(self, documents: list[str], metadatas: list[dict]) -> bool:
-        """Add documents to the Neon/Postgres vector store."""
+        Args:
+            documents: Chunk texts to embed and store
+            metadatas: One metadata dict per document
+            embed_batch_size: Max texts per embedding API call (None = single call)
+            upsert_batch_size: Max rows per COPY call (None = single call)
+        """
         if not self.embedding_service.client:
             logger.error("Embedding service not configured. Cannot add documents.")
             return False
@@ -66,7 +283,9 @@ class RAGService:
             # But we need embeddings first.
             # Generate embeddings in batch
             try:
-                embeddings = await self.embedding_service.get_embeddings(documents)
+                embeddings = await self.embedding_service.embed_documents(
+                    documents, batch_size=embed_batch_size
+                )
             except Exception:
                 logger.error("Failed to generate embeddings after retries. Aborting batch.")
                 return False
@@ -75,41 +294,56 @@ class RAGService:
                 logger.error("Mismatch in embedding count. Aborting.")
                 return False
 
-            records = []
-            for doc, meta, emb in zip(documents, metadatas, embeddings):
-                try:
-                    meta_json = json.dumps(meta)
-                except (TypeError, ValueError) as e:
-                    logger.warning(
-                        "Failed to serialize metadata for document (first 100 chars: %s): %s. "
-                        "Using fallback serialization (default=str). in index %d",
-                        doc[:100] if doc else "N/A",
-                        str(e),
-                        documents.index(doc),
-                    )
-                    meta_json = json.dumps(meta, default=str)
-                records.append((doc, meta_json, str(emb)))
+            # Metadata dicts go straight to the jsonb codec (database._encode_jsonb), which
+            # serializes them during COPY instead of in a separate json.dumps pass
+            records = list(zip(documents, metadatas, embeddings))
 
+            upsert_step = upsert_batch_size or len(records) or 1
             async with db_service.pool.acquire() as conn, conn.transaction():
-                # Use executemany for valid batch insertion
-                # Note: asyncpg executemany corresponds to executing the same statement with different arguments
-                await conn.executemany(
-                    """
-                    INSERT INTO documents (content, metadata, embedding)
-                    VALUES ($1, $2, $3::vector)
-                    """,
-                    records,
-                )
+                # Binary COPY skips per-row parse/plan; vectors go through the pgvector
+                # binary codec registered on pool connections (see database._init_connection)
+                for start in range(0, len(records), upsert_step):
+                    await conn.copy_records_to_table(
+                        "documents",
+                        records=records[start : start + upsert_step],
+                        columns=["content", "metadata", "embedding"],
+                    )
 
             logger.info("✅ Added %d documents to Neon vector store in batch.", len(documents))
+            # Cached searches (and the document count) may now miss the new chunks
+            self.query_cache.clear()
+            self._stats_cache = None
             return True
 
         except Exception as e:
             logger.error("Failed to add documents to RAG: %s", str(e))
             return False
 
+    async def add_documents_batched(
+        self,
+        batches: list[tuple[list[str], list[dict]]],
+        embed_batch_size: int = 128,
+        upsert_batch_size: int = 500,
+    ) -> bool:
+        """Add several (documents, metadatas) buffers, e.g. from many small files, at once.
+
+        Os buffers são concatenados para que arquivos pequenos compartilhem chamadas de
+        embedding e escritas no banco. Tudo é gravado numa única transação, portanto o
+        resultado vale para todos os buffers.
+        """
+        documents = [doc for docs, _ in batches for doc in docs]
+        metadatas = [meta for _, metas in batches for meta in metas]
+        if not documents:
+            return True
+        return await self.add_documents(
+            documents,
+            metadatas,
+            embed_batch_size=embed_batch_size,
+            upsert_batch_size=upsert_batch_size,
+        )
+
     async def query(
-        self, query_text: str, n_results: int = 5, filter_metadata: dict = None
+        self, query_text: str, n_results: int = 5, filter_metadata: Optional[dict] = None
     ) -> list[str]:
         """
         Search for relevant documents using Hybrid Search (Vector + Keyword) with RRF.
@@ -117,109 +351,16 @@ class RAGService:
         Args:
             query_text: The search query
             n_results: Number of results to return
-            filter_metadata: Optional dictionary to filter results by metadata (e.g. {"type": "Súmula"})
+            filter_metadata: Optional dictionary to filter results by metadata (e.g. {"type": "Súmula"}).
+                "year" and "chunk_index" match as numbers, other keys as strings, whichever
+                type the caller passes ({"year": "1993"} and {"number": 14133} both match)
         """
         if not self.embedding_service.client:
             return []
 
         try:
-            # 1. Get Vector Embeddings
-            query_embedding = await self.embedding_service.get_embedding(query_text)
-            if not query_embedding:
-                return []
-            embedding_str = str(query_embedding)
-
-            await db_service.connect()
-
-            # Text search language configuration
-            allowed_languages = {
-                "portuguese",
-                "english",
-                "spanish",
-                "french",
-                "german",
-                "italian",
-                "dutch",
-                "russian",
-                "simple",
-            }
-            text_search_lang = os.environ.get("TEXT_SEARCH_LANG", "portuguese").lower()
-            if text_search_lang not in allowed_languages:
-                text_search_lang = "portuguese"
-
-            # Build metadata filter clause
-            filter_clause = ""
-            filter_params = []
-            if filter_metadata:
-                clauses = []
-                # Start index at 3 because $1 and $2 are reserved for specific query params
-                current_idx = 3
-                for key, value in filter_metadata.items():
-                    # Sanitize key to prevent SQL injection (metadata keys should be simple identifiers)
-                    if not key.replace("_", "").isalnum():
-                        logger.warning("Skipping invalid metadata filter key: %s", key)
-                        continue
-
-                    clauses.append(f"metadata->>'{key}' = ${current_idx}")
-                    filter_params.append(str(value))
-                    current_idx += 1
-                if clauses:
-                    filter_clause = "AND " + " AND ".join(clauses)
-
-            async with db_service.pool.acquire() as conn:
-                # Vector Search
-                # Params: $1=embedding, $2=limit, $3...=filters
-                vector_args = [embedding_str, n_results * 2] + filter_params
-                vector_rows = await conn.fetch(
-                    f"""
-                    SELECT id, content
-                    FROM documents
-                    WHERE 1=1 {filter_clause}
-                    ORDER BY embedding <=> $1::vector
-                    LIMIT $2
-                    """,
-                    *vector_args,
-                )
-
-                # Keyword Search (Full Text)
-                # Params: $1=query, $2=limit, $3...=filters
-                keyword_args = [query_text, n_results * 2] + filter_params
-                keyword_rows = await conn.fetch(
-                    f"""
-                    SELECT id, content
-                    FROM documents
-                    WHERE content_search @@ websearch_to_tsquery('{text_search_lang}', $1)
-                    {filter_clause}
-                    ORDER BY ts_rank(content_search, websearch_to_tsquery('{text_search_lang}', $1)) DESC
-                    LIMIT $2
-                    """,
-                    *keyword_args,
-                )
-
-            # 3. Reciprocal Rank Fusion (RRF)
-            # RRF score = 1 / (k + rank)
-            k = 60
-            scores = {}
-
-            # Process Vector Results
-            for rank, row in enumerate(vector_rows):
-                doc_id = row["id"]
-                scores[doc_id] = scores.get(doc_id, {"score": 0, "content": row["content"]})
-                scores[doc_id]["score"] += 1 / (k + rank + 1)
-
-            # Process Keyword Results
-            for rank, row in enumerate(keyword_rows):
-                doc_id = row["id"]
-                # If we have a match, boost it
-                if doc_id not in scores:
-                    scores[doc_id] = {"score": 0, "content": row["content"]}
-                scores[doc_id]["score"] += 1 / (k + rank + 1)
-
-            # Sort by combined score
-            sorted_docs = sorted(scores.values(), key=lambda x: x["score"], reverse=True)
-
-            # Return top N content
-            return [doc["content"] for doc in sorted_docs[:n_results]]
+            ranked = await self._hybrid_search(query_text, n_results, filter_metadata)
+            return [content for _, content in ranked if content is not None]
 
         except Exception as e:
             # Log the full stack trace internally
@@ -227,12 +368,117 @@ class RAGService:
             # Return empty list to degrade gracefully
             return []
 
+    async def count_matches(
+        self, query_text: str, n_results: int = 5, filter_metadata: Optional[dict] = None
+    ) -> int:
+        """Same search as `query`, but only counts the hits: chunk contents are not fetched."""
+        if not self.embedding_service.client:
+            return 0
+
+        try:
+            ranked = await self._hybrid_search(
+                query_text, n_results, filter_metadata, with_content=False
+            )
+            return len(ranked)
+        except Exception as e:
+            logger.exception("RAG Query failed: %s", str(e))
+            return 0
+
+    async def _hybrid_search(
+        self,
+        query_text: str,
+        n_results: int,
+        filter_metadata: Optional[dict],
+        with_content: bool = True,
+    ) -> list[tuple[int, Optional[str]]]:
+        """Coalesce concurrent identical searches into one run of `_run_hybrid_search`.
+
+        The shared task is shielded: a caller that gets cancelled (e.g. a stale
+        message's prefetch) doesn't cancel the search for the others.
+        """
+        if filter_metadata:
+            filter_metadata = _normalize_filter(filter_metadata)
+        key = (
+            query_text,
+            n_results,
+            with_content,
+            json.dumps(filter_metadata, sort_keys=True) if filter_metadata else None,
+        )
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._run_hybrid_search(query_text, n_results, filter_metadata, with_content)
+            )
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._forget_search(key, t))
+        return await asyncio.shield(task)
+
+    def _forget_search(self, key: tuple, task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        # Mark the error as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _run_hybrid_search(
+        self,
+        query_text: str,
+        n_results: int,
+        filter_metadata: Optional[dict],
+        with_content: bool = True,
+    ) -> list[tuple[int, Optional[str]]]:
+        """Run vector + keyword search fused with RRF in SQL. Returns top (id, content) pairs."""
+        # 1. Get Vector Embeddings
+        query_embedding = await self.embedding_service.get_embedding(query_text)
+        if not query_embedding:
+            return []
+
+        cache_namespace = (
+            n_results,
+            with_content,
+            json.dumps(filter_metadata, sort_keys=True) if filter_metadata else None,
+        )
+        cache_guard = _query_cache_guard(query_text)
+        cached = self.query_cache.get(query_embedding, cache_namespace, cache_guard)
+        if cached is not None:
+            return cached
+
+        await db_service.connect()
+
+        # Metadata filter: containment on values already in their stored JSON type
+        # (see _normalize_filter), e.g. {"year": 1993}, {"number": "14133"}
+        filter_params = [filter_metadata] if filter_metadata else []
+        sql = _hybrid_search_sql(self.text_search_lang, with_content, bool(filter_metadata))
+
+        async with db_service.pool.acquire() as conn:
+            rows = await conn.fetch(
+                sql,
+                # Binary pgvector codec (database._init_connection): no ~20 KB text literal
+                query_embedding,
+                query_text,
+                n_results * 2,
+                n_results,
+                *filter_params,
+            )
+
+        # Rows arrive already fused by RRF and ordered, top N only
+        ranked = [(row["id"], row.get("content")) for row in rows]
+        self.query_cache.set(query_embedding, ranked, cache_namespace, cache_guard)
+        return ranked
+
     async def get_stats(self) -> dict:
+        """Document count of the vector store; COUNT(*) scans, so it's cached briefly."""
+        if self._stats_cache is not None:
+            expires_at, stats = self._stats_cache
+            if time.monotonic() < expires_at:
+                return dict(stats)
+
         try:
             await db_service.connect()
             async with db_service.pool.acquire() as conn:
                 count = await conn.fetchval("SELECT COUNT(*) FROM documents")
-                return {"status": "active", "count": count, "backend": "neon-pgvector"}
+            stats = {"status": "active", "count": count, "backend": "neon-pgvector"}
+            self._stats_cache = (time.monotonic() + _STATS_TTL_SECONDS, stats)
+            return dict(stats)
         except Exception as e:
             logger.error("Failed to get RAG stats: %s", str(e))
             return {"status": "error", "error": str(e)}
@@ -0,0 +1,131 @@
+"""Approximate cache for RAG lookups.
+
+SemanticCache matches queries by embedding similarity instead of exact text.
+It has no import-time side effects (no bot settings are read), so scripts such
+as ingest_docs can use the RAG service without the Discord environment.
+"""
+
+import time
+from collections.abc import Sequence
+from typing import Any, Optional
+
+try:
+    import numpy as np
+except ImportError:  # Declared dependency; SemanticCache is disabled if it is missing
+    np = None  # type: ignore[assignment]
+
+
+class _SemanticBucket:
+    """Normalized embeddings (rows of a preallocated matrix) + values for one namespace."""
+
+    __slots__ = ("keys", "values", "guards", "created", "used", "size")
+
+    def __init__(self, max_size: int, dim: int):
+        self.keys = np.zeros((max_size, dim), dtype=np.float32)
+        self.values: list[Any] = [None] * max_size
+        self.guards: list[Any] = [None] * max_size
+        self.created = [0.0] * max_size
+        self.used = [0.0] * max_size
+        self.size = 0
+
+
+class SemanticCache:
+    """Cache aproximado: reaproveita o resultado de consultas com embedding quase idêntico.
+
+    Uma busca é um produto matriz-vetor sobre os embeddings guardados; há hit quando a
+    distância de cosseno até uma entrada é <= `max_distance` e o `guard` da entrada é
+    igual ao da consulta. O guard carrega o que o embedding não distingue com segurança
+    (ex.: os números de "Súmula 473" e "Súmula 474").
+
+    Args:
+        max_size: Entradas por namespace (0 desativa o cache)
+        max_distance: Distância de cosseno máxima para considerar a consulta repetida
+        ttl_seconds: Tempo de vida de cada entrada
+    """
+
+    def __init__(self, max_size: int = 256, max_distance: float = 0.05, ttl_seconds: int = 600):
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self._buckets: dict[Any, _SemanticBucket] = {}
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return np is not None and self.max_size > 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def get(
+        self, embedding: Sequence[float], namespace: Any = None, guard: Any = None
+    ) -> Optional[Any]:
+        """Value of the nearest close-enough cached embedding with the same guard, or None."""
+        if not self.enabled:
+            return None
+        bucket = self._buckets.get(namespace)
+        query = self._normalize(embedding)
+        if (
+            bucket is None
+            or not bucket.size
+            or query is None
+            or query.shape[0] != bucket.keys.shape[1]
+        ):
+            self._misses += 1
+            return None
+
+        scores = bucket.keys[: bucket.size] @ query
+        # Only the few entries within max_distance are checked, nearest first
+        close = np.flatnonzero(scores >= 1.0 - self.max_distance)
+        now = time.time()
+        for i in close[np.argsort(-scores[close])]:
+            i = int(i)
+            if bucket.guards[i] == guard and now - bucket.created[i] <= self.ttl_seconds:
+                bucket.used[i] = now
+                self._hits += 1
+                return bucket.values[i]
+
+        self._misses += 1
+        return None
+
+    def set(
+        self, embedding: Sequence[float], value: Any, namespace: Any = None, guard: Any = None
+    ) -> None:
+        """Stores a value; evicts the least recently used entry when the namespace is full."""
+        if not self.enabled:
+            return
+        query = self._normalize(embedding)
+        if query is None:
+            return
+        bucket = self._buckets.get(namespace)
+        if bucket is None or bucket.keys.shape[1] != query.shape[0]:
+            bucket = self._buckets[namespace] = _SemanticBucket(self.max_size, query.shape[0])
+
+        if bucket.size < self.max_size:
+            slot = bucket.size
+            bucket.size += 1
+        else:
+            slot = min(range(bucket.size), key=bucket.used.__getitem__)
+
+        now = time.time()
+        bucket.keys[slot] = query
+        bucket.values[slot] = value
+        bucket.guards[slot] = guard
+        bucket.created[slot] = now
+        bucket.used[slot] = now
+
+    def clear(self) -> None:
+        """Drops every entry (e.g. after new documents are ingested)."""
+        self._buckets.clear()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "size": sum(bucket.size for bucket in self._buckets.values()),
+        }
@@ -1,5 +1,4 @@
 import logging
-from collections.abc import Iterator
 from typing import Optional
 
 import discord
@@ -11,11 +10,17 @@ from src.base import Message
 logger = logging.getLogger(__name__)
 
 
+_THREAD_STARTER = discord.MessageType.thread_starter_message
+
+
 def discord_message_to_message(message: DiscordMessage) -> Optional[Message]:
     """Convert a Discord Message to internal Message format."""
+    # Common case first: ordinary messages skip the embed lookup entirely
+    if message.type is not _THREAD_STARTER:
+        return Message(user=message.author.name, text=message.content) if message.content else None
+
     if (
-        message.type == discord.MessageType.thread_starter_message
-        and message.reference
+        message.reference
         and (cached := message.reference.cached_message)
         and cached.embeds
         and cached.embeds[0].fields
@@ -30,26 +35,47 @@ def discord_message_to_message(message: DiscordMessage) -> Optional[Message]:
     return None
 
 
-def split_into_shorter_messages(message: str) -> Iterator[str]:
-    """Divide a message into chunks within Discord's character limit using a generator."""
+def split_into_shorter_messages(message: str) -> list[str]:
+    """Divide a message into chunks within Discord's character limit."""
     from src.constants import MAX_CHARS_PER_REPLY_MSG
 
-    for i in range(0, len(message), MAX_CHARS_PER_REPLY_MSG):
-        yield message[i : i + MAX_CHARS_PER_REPLY_MSG]
+    # Most replies fit in one message: no slicing
+    if len(message) <= MAX_CHARS_PER_REPLY_MSG:
+        return [message] if message else []
+    return [
+        message[i : i + MAX_CHARS_PER_REPLY_MSG]
+        for i in range(0, len(message), MAX_CHARS_PER_REPLY_MSG)
+    ]
+
+
+_MASK_63 = (1 << 63) - 1
+
+
+def mention_thread_id(channel_id: int, user_id: int) -> int:
+    """Stable per-(channel, user) history key for mentions, within Postgres BIGINT range.
+
+    Integer mixing instead of hash(str): str hashes are salted per process, which
+    split a user's mention history on every restart.
+    """
+    return ((channel_id * 0x9E3779B97F4A7C15) ^ user_id) & _MASK_63
 
 
 def is_last_message_stale(
     interaction_message: DiscordMessage, last_message: Optional[DiscordMessage], bot_id: int
 ) -> bool:
     """Check if the last message in a thread is from someone other than the bot and not the current interaction."""
-    if not last_message:
+    if not last_message or last_message.id == interaction_message.id:
         return False
 
-    return (
-        last_message.id != interaction_message.id
-        and last_message.author is not None
-        and last_message.author.id != bot_id
-    )
+    author = last_message.author
+    return author is not None and author.id != bot_id
+
+
+# Sent as-is by close_thread (send() only serializes it), so built once
+_CLOSED_EMBED = discord.Embed(
+    description="**Thread closed** - Context limit reached, closing...",
+    color=discord.Color.blue(),
+)
 
 
 async def close_thread(thread: discord.Thread) -> None:
@@ -57,27 +83,22 @@ async def close_thread(thread: discord.Thread) -> None:
     from src.constants import INACTIVATE_THREAD_PREFIX
 
     try:
-        await thread.edit(name=INACTIVATE_THREAD_PREFIX)
-        await thread.send(
-            embed=discord.Embed(
-                description="**Thread closed** - Context limit reached, closing...",
-                color=discord.Color.blue(),
-            )
-        )
-        await thread.edit(archived=True, locked=True)
+        await thread.send(embed=_CLOSED_EMBED)
+        # Rename, archive and lock in a single PATCH
+        await thread.edit(name=INACTIVATE_THREAD_PREFIX, archived=True, locked=True)
     except discord.HTTPException as e:
         logger.error("Failed to close thread %s: %s", thread.id, e)
 
 
 def should_block(guild: Optional[discord.Guild]) -> bool:
     """Determine if a message should be blocked based on guild allowlist."""
-    from src.constants import ALLOWED_SERVER_IDS
+    from src.constants import ALLOWED_SERVER_SET
 
     if guild is None:
         logger.info("Access denied: Private messages (DMs) are not supported.")
         return True
 
-    if guild.id not in ALLOWED_SERVER_IDS:
+    if guild.id not in ALLOWED_SERVER_SET:
         logger.info(
             "Access denied: Guild %s (ID: %s) is not in the allowed list.", guild.name, guild.id
         )
@@ -1,9 +1,10 @@
+import contextlib
 import os
-import uuid
 from pathlib import Path
 
 import asyncpg
 import pytest
+import pytest_asyncio
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,14 +12,17 @@ load_dotenv()
 
 def generate_unique_ids() -> tuple[int, int, int]:
     """Generate unique IDs for test isolation."""
-    return uuid.uuid4().int % (10**18), uuid.uuid4().int % (10**18), uuid.uuid4().int % (10**18)
+    # One urandom call for all three IDs (same 128 random bits per ID as uuid4)
+    rb = os.urandom(48)
+    return tuple(int.from_bytes(rb[i : i + 16], "big") % (10**18) for i in (0, 16, 32))
 
 
-@pytest.fixture(scope="function")
+# Tests run on the session loop (asyncio_default_test_loop_scope), like this pool
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def database_pool():
     """
-    Creates a database pool for integration tests.
-    Skips if DATABASE_URL is not set.
+    Creates a database pool for integration tests, once per session; the
+    schema is applied once too. Skips if DATABASE_URL is not set.
     """
     dsn = os.environ.get("DATABASE_URL")
     if not dsn:
@@ -26,15 +30,29 @@ async def database_pool():
 
     pool = None
     try:
-        pool = await asyncpg.create_pool(dsn, min_size=1, max_size=5)
+        # Same tuning as DatabaseService.connect: the suite repeats a handful of
+        # statements, so keep them prepared on the long-lived session connections
+        pool = await asyncpg.create_pool(
+            dsn,
+            min_size=1,
+            max_size=10,
+            command_timeout=30,
+            statement_cache_size=1024,
+            max_queries=50000,
+            max_inactive_connection_lifetime=300,
+        )
 
         # Initialize Schema
         schema_path = Path(__file__).parent.parent / "scripts" / "init_schema.sql"
         if schema_path.exists():
-            with open(schema_path) as f:
-                sql = f.read()
-                async with pool.acquire() as conn:
-                    await conn.execute(sql)
+            # Idempotent DDL (IF NOT EXISTS), applied once per session
+            async with pool.acquire() as conn:
+                await conn.execute(schema_path.read_text(encoding="utf-8"))
+
+        # Clean start for the session; from here on committed_db empties the tables
+        # after each test that commits, and clean_db tests never commit anything
+        async with pool.acquire() as conn:
+            await conn.execute("TRUNCATE TABLE messages, analytics, threads CASCADE;")
 
         yield pool
 
@@ -46,29 +64,56 @@ async def database_pool():
             await pool.close()
 
 
-@pytest.fixture(scope="function")
+class _TransactionPool:
+    """Pool stand-in that hands out one connection, already inside the test's transaction."""
+
+    def __init__(self, conn: asyncpg.Connection):
+        self._conn = conn
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        yield self._conn
+
+    async def close(self) -> None:
+        pass
+
+
+@pytest_asyncio.fixture(scope="function", loop_scope="session")
 async def clean_db(database_pool):
     """
-    Yields the pool, ensuring tables are truncated after the test.
+    Yields a connection inside a transaction that is rolled back after the test:
+    nothing is ever committed, so no cleanup is needed. Nested transactions in
+    the code under test become savepoints.
     """
-    # Truncate before usage to ensure a clean start
-    try:
-        async with database_pool.acquire() as conn:
-            await conn.execute("TRUNCATE TABLE messages, analytics, threads CASCADE;")
-    except Exception as e:
-        pytest.fail(f"Failed to truncate tables before test: {e}")
+    async with database_pool.acquire() as conn:
+        transaction = conn.transaction()
+        await transaction.start()
+        try:
+            yield conn
+        finally:
+            await transaction.rollback()
+
 
+@pytest_asyncio.fixture(scope="function", loop_scope="session")
+async def committed_db(database_pool):
+    """
+    Yields the pool for tests that need committed rows (e.g. distinct
+    CURRENT_TIMESTAMP defaults per insert), emptying tables after the test.
+    """
+    # No pre-test cleanup: database_pool truncates once at session start and every
+    # committed_db test empties the tables on the way out, so they are always clean here
     yield database_pool
 
-    # Cleanup after test
+    # Cleanup after test. A handful of rows: DELETE (one implicit transaction, children
+    # first) avoids TRUNCATE's ACCESS EXCLUSIVE lock and catalog update
     try:
         async with database_pool.acquire() as conn:
-            await conn.execute("TRUNCATE TABLE messages, analytics, threads CASCADE;")
+            await conn.execute("DELETE FROM messages; DELETE FROM analytics; DELETE FROM threads;")
     except Exception as e:
         # Log but don't fail - test already passed/failed
         import logging
 
-        logging.warning("Failed to truncate tables after test: %s", e)
+        logging.warning("Failed to clean up tables after test: %s", e)
 
 
 @pytest.fixture(scope="function")
@@ -77,11 +122,24 @@ def unique_ids() -> tuple[int, int, int]:
     return generate_unique_ids()
 
 
-@pytest.fixture(scope="function")
+@pytest_asyncio.fixture(scope="function", loop_scope="session")
 async def database_service(clean_db):
     """
-    Yields an initialized DatabaseService, ensuring it is closed after use.
-    Depends on clean_db to ensure database is ready.
+    Yields a DatabaseService whose queries all run inside the clean_db
+    transaction (rolled back after the test).
+    """
+    from src.database import DatabaseService
+
+    service = DatabaseService()
+    service.pool = _TransactionPool(clean_db)
+    yield service
+
+
+@pytest_asyncio.fixture(scope="function", loop_scope="session")
+async def committed_database_service(committed_db):
+    """
+    Yields an initialized DatabaseService with its own pool (rows are committed),
+    ensuring it is closed after use.
     """
     from src.database import DatabaseService
 
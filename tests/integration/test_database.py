@@ -1,5 +1,11 @@
 import pytest
 from src.base import ThreadConfig
+from src.db_writer import MessageLogWriter
+
+# Rolled-back tests are isolated, but each worker's session-start TRUNCATE and
+# committed_db's table-wide DELETE would wipe rows another worker's test is using:
+# keep them on a single xdist worker
+pytestmark = pytest.mark.xdist_group("db")
 
 
 @pytest.mark.asyncio
@@ -8,7 +14,8 @@ async def test_save_and_get_thread(database_service, unique_ids):
     thread_id, guild_id, user_id = unique_ids
     config = ThreadConfig(model="gpt-4", temperature=0.7, max_tokens=100)
 
-    await database_service.save_thread(thread_id, guild_id, user_id, config)
+    saved = await database_service.save_thread(thread_id, guild_id, user_id, config)
+    assert saved == config
 
     retrieved = await database_service.get_thread_config(thread_id)
     assert retrieved is not None
@@ -18,8 +25,44 @@ async def test_save_and_get_thread(database_service, unique_ids):
 
 
 @pytest.mark.asyncio
-async def test_log_and_get_messages(database_service, unique_ids):
+async def test_thread_config_cache_follows_updates(database_service, unique_ids):
+    """Cached thread configs are replaced when the thread is saved again."""
+    thread_id, guild_id, user_id = unique_ids
+    first = ThreadConfig(model="gpt-4", temperature=0.5, max_tokens=100)
+    second = ThreadConfig(model="claude", temperature=0.5, max_tokens=200)
+
+    await database_service.save_thread(thread_id, guild_id, user_id, first)
+    assert await database_service.get_thread_config(thread_id) == first
+
+    await database_service.save_thread(thread_id, guild_id, user_id, second)
+    assert await database_service.get_thread_config(thread_id) == second
+
+    database_service._config_cache.clear()
+    assert await database_service.get_thread_config(thread_id) == second
+
+
+@pytest.mark.asyncio
+async def test_thread_config_cache_expires(database_service, unique_ids, monkeypatch):
+    """Changes made outside the service show up once the cached entry expires."""
+    thread_id, guild_id, user_id = unique_ids
+    config = ThreadConfig(model="gpt-4", temperature=0.5, max_tokens=100)
+    await database_service.save_thread(thread_id, guild_id, user_id, config)
+
+    async with database_service.pool.acquire() as conn:
+        await conn.execute("UPDATE threads SET max_tokens = 300 WHERE thread_id = $1", thread_id)
+    assert await database_service.get_thread_config(thread_id) == config
+
+    monkeypatch.setattr("src.database._CONFIG_CACHE_TTL", 0.0)
+    database_service._cache_config(thread_id, config)
+    refreshed = await database_service.get_thread_config(thread_id)
+    assert refreshed.max_tokens == 300
+
+
+@pytest.mark.asyncio
+async def test_log_and_get_messages(committed_database_service, unique_ids):
     """Test logging messages and retrieving history."""
+    # Committed rows: inside one transaction every insert gets the same CURRENT_TIMESTAMP
+    database_service = committed_database_service
     thread_id, guild_id, user_id = unique_ids
     await database_service.save_thread(
         thread_id=thread_id,
@@ -63,3 +106,101 @@ async def test_log_analytics(database_service, unique_ids):
     # Use public method for verification
     count = await database_service.get_analytics_count(thread_id)
     assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_save_thread_and_log(database_service, unique_ids):
+    """Thread upsert and message log happen together."""
+    thread_id, guild_id, user_id = unique_ids
+    config = ThreadConfig(model="test", temperature=0.5, max_tokens=50)
+
+    await database_service.save_thread_and_log(
+        thread_id, guild_id, user_id, config, role="user", content="Hello bot"
+    )
+
+    assert await database_service.get_thread_config(thread_id) == config
+    messages = await database_service.get_messages(thread_id)
+    assert [(m.user, m.text) for m in messages] == [("user", "Hello bot")]
+
+
+@pytest.mark.asyncio
+async def test_message_log_writer_batches(database_service, unique_ids):
+    """Enqueued messages are written in order once flushed."""
+    thread_id, guild_id, user_id = unique_ids
+    await database_service.save_thread(
+        thread_id, guild_id, user_id, ThreadConfig(model="test", temperature=0.5, max_tokens=50)
+    )
+
+    writer = MessageLogWriter(database_service, batch_size=2, max_delay_ms=10)
+    for i in range(5):
+        writer.log_message(thread_id, "user" if i % 2 == 0 else "assistant", f"msg {i}")
+    await writer.close()
+
+    messages = await database_service.get_messages(thread_id)
+    assert [m.text for m in messages] == [f"msg {i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_message_log_writer_flush_thread(database_service, unique_ids):
+    """flush_thread returns once that thread's rows are written, with their authors."""
+    thread_id, guild_id, user_id = unique_ids
+    await database_service.save_thread(
+        thread_id, guild_id, user_id, ThreadConfig(model="test", temperature=0.5, max_tokens=50)
+    )
+
+    writer = MessageLogWriter(database_service, batch_size=2, max_delay_ms=10)
+    writer.log_message(thread_id, "user", "from alice", author="alice")
+    writer.log_message(thread_id, "user", "from bob", author="bob")
+    writer.log_message(thread_id, "assistant", "reply")
+    await writer.flush_thread(thread_id)
+
+    messages = await database_service.get_messages(thread_id)
+    assert [m.user for m in messages] == ["alice", "bob", "assistant"]
+    # Nothing pending: returns immediately
+    await writer.flush_thread(thread_id)
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_get_messages_page_keyset(committed_database_service, unique_ids):
+    """Pages walk back through history using the returned cursor."""
+    # Committed rows: inside one transaction every insert gets the same CURRENT_TIMESTAMP
+    database_service = committed_database_service
+    thread_id, guild_id, user_id = unique_ids
+    await database_service.save_thread(
+        thread_id, guild_id, user_id, ThreadConfig(model="test", temperature=0.5, max_tokens=50)
+    )
+    for i in range(5):
+        await database_service.log_message(thread_id, "user", f"msg {i}")
+
+    newest, cursor = await database_service.get_messages_page(thread_id, limit=2)
+    assert [m.text for m in newest] == ["msg 3", "msg 4"]
+
+    older, cursor = await database_service.get_messages_page(thread_id, limit=2, before=cursor)
+    assert [m.text for m in older] == ["msg 1", "msg 2"]
+
+    oldest, cursor = await database_service.get_messages_page(thread_id, limit=2, before=cursor)
+    assert [m.text for m in oldest] == ["msg 0"]
+
+    empty, cursor = await database_service.get_messages_page(thread_id, limit=2, before=cursor)
+    assert empty == [] and cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_messages_page_duplicate_timestamps(database_service, unique_ids):
+    """Rows sharing one created_at are neither skipped nor repeated across pages."""
+    # Inside the test transaction every insert gets the same CURRENT_TIMESTAMP
+    thread_id, guild_id, user_id = unique_ids
+    await database_service.save_thread(
+        thread_id, guild_id, user_id, ThreadConfig(model="test", temperature=0.5, max_tokens=50)
+    )
+    for i in range(5):
+        await database_service.log_message(thread_id, "user", f"msg {i}")
+
+    seen = []
+    page, cursor = await database_service.get_messages_page(thread_id, limit=2)
+    while page:
+        seen = [m.text for m in page] + seen
+        page, cursor = await database_service.get_messages_page(thread_id, limit=2, before=cursor)
+
+    assert seen == [f"msg {i}" for i in range(5)]
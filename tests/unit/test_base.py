@@ -0,0 +1,106 @@
+"""Tests for prompt rendering in the base module."""
+
+import pytest
+from src.base import Conversation, Message, Prompt, get_model_provider
+
+BOT = "Sherlock"
+
+
+def _examples():
+    return [Conversation([Message("alice", "Olá"), Message(BOT, "Oi, em que posso ajudar?")])]
+
+
+def _prompt(messages, examples=None):
+    return Prompt(
+        header=Message("system", "Instructions for Sherlock: be brief."),
+        examples=_examples() if examples is None else examples,
+        convo=Conversation(messages),
+    )
+
+
+class TestFullRender:
+    """Tests for Prompt.full_render."""
+
+    def test_layout_puts_context_before_latest_message(self):
+        """[static system, *history, RAG system, latest message]."""
+        prompt = _prompt(
+            [
+                Message("alice", "Art. 5?"),
+                Message(BOT, "Trata de direitos."),
+                Message("bob", "E o 6?"),
+            ]
+        )
+        rendered = prompt.full_render(
+            BOT, "openai/gpt-4o", "<relevant_context>x</relevant_context>"
+        )
+
+        assert [m["role"] for m in rendered] == ["system", "user", "assistant", "system", "user"]
+        assert "Example conversations:" in rendered[0]["content"]
+        assert rendered[1] == {"role": "user", "name": "alice", "content": "Art. 5?"}
+        assert rendered[2] == {"role": "assistant", "name": BOT, "content": "Trata de direitos."}
+        assert rendered[3] == {
+            "role": "system",
+            "content": "<relevant_context>x</relevant_context>",
+        }
+        assert rendered[4] == {"role": "user", "name": "bob", "content": "E o 6?"}
+
+    def test_prefix_is_identical_with_and_without_context(self):
+        """The RAG context never shifts the static prefix or the earlier turns."""
+        prompt = _prompt([Message("alice", "Art. 5?"), Message("alice", "E o 6?")])
+        with_context = prompt.full_render(BOT, "openai/gpt-4o", "contexto")
+        without_context = prompt.full_render(BOT, "openai/gpt-4o")
+
+        assert with_context[:2] == without_context[:2]
+        assert len(with_context) == len(without_context) + 1
+        assert with_context[-1] == without_context[-1]
+
+    def test_blank_context_adds_nothing(self):
+        prompt = _prompt([Message("alice", "Oi")])
+        assert len(prompt.full_render(BOT, "openai/gpt-4o", "  \n")) == 2
+
+    def test_empty_model_rejected(self):
+        with pytest.raises(ValueError):
+            _prompt([Message("alice", "Oi")]).full_render(BOT, " ")
+
+
+class TestStaticSystemMessage:
+    """Tests for the provider dispatch and caching of the static system message."""
+
+    @pytest.mark.parametrize(
+        "model,provider",
+        [
+            ("anthropic/claude-3.5-sonnet", "anthropic"),
+            ("google/gemini-2.0-flash", "gemini"),
+            ("openai/gpt-4o", "openai"),
+            ("meta-llama/llama-3-70b", "other"),
+            (None, "other"),
+        ],
+    )
+    def test_get_model_provider(self, model, provider):
+        assert get_model_provider(model) == provider
+
+    def test_builders_per_provider(self):
+        prompt = _prompt([Message("alice", "Oi")])
+        anthropic = prompt.full_render(BOT, "anthropic/claude-3.5-sonnet")[0]["content"]
+        gemini = prompt.full_render(BOT, "google/gemini-2.0-flash")[0]["content"]
+        openai = prompt.full_render(BOT, "openai/gpt-4o")[0]["content"]
+        other = prompt.full_render(BOT, "meta-llama/llama-3-70b")[0]["content"]
+
+        assert anthropic == [
+            {"type": "text", "text": openai, "cache_control": {"type": "ephemeral"}}
+        ]
+        assert gemini == [{"type": "text", "text": openai}]
+        assert isinstance(openai, str) and other == openai
+
+    def test_cached_on_example_content(self):
+        """Equal examples share one rendered message; changed examples get a new one."""
+        first = _prompt([Message("alice", "Oi")]).full_render(BOT, "openai/gpt-4o")[0]
+        same = _prompt([Message("bob", "Oi")]).full_render(BOT, "openai/gpt-4o")[0]
+        assert same is first
+
+        changed = _examples()
+        changed[0].messages.append(Message("alice", "Obrigado"))
+        other = _prompt([Message("alice", "Oi")], changed).full_render(BOT, "openai/gpt-4o")[0]
+        assert other is not first
+        assert other["content"].endswith("Now, you will work with the actual current conversation.")
+        assert "alice: Obrigado" in other["content"]
@@ -1,8 +1,50 @@
 """Tests for cache module."""
 
+import threading
 import time
 
+import pytest
 from src.cache import CacheEntry, LRUCache
+from src.semantic_cache import SemanticCache
+
+
+class MockMessage:
+    """Stand-in for src.base.Message: only user/text are read by the cache key."""
+
+    __slots__ = ("user", "text")
+
+    def __init__(self, user, text):
+        self.user = user
+        self.text = text
+
+
+class FakeClock:
+    """Stands in for the time module in src.cache; time() ticks 1µs per read."""
+
+    def __init__(self):
+        # Real start, so CacheEntry's default_factory timestamps stay comparable
+        self.now = time.time()
+
+    def time(self):
+        self.now += 1e-6
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr("src.cache.time", fake)
+    monkeypatch.setattr("src.semantic_cache.time", fake)
+    return fake
+
+
+@pytest.fixture(scope="session")
+def messages():
+    """One-message conversation shared by the key tests (the cache only reads it)."""
+    return [MockMessage("user1", "hello")]
 
 
 class TestCacheEntry:
@@ -26,53 +68,34 @@ class TestLRUCache:
         assert result is None
         assert cache.stats["misses"] == 1
 
-    def test_set_and_get(self):
+    def test_set_and_get(self, messages):
         """Setting and getting a value should work."""
         cache = LRUCache(max_size=10, ttl_seconds=60)
 
-        # Mock messages with user/text attributes
-        class MockMessage:
-            def __init__(self, user, text):
-                self.user = user
-                self.text = text
-
-        messages = [MockMessage("user1", "hello")]
         cache.set(messages, "gpt-4", "response")
 
         result = cache.get(messages, "gpt-4")
         assert result == "response"
         assert cache.stats["hits"] == 1
 
-    def test_different_models_different_keys(self):
+    def test_different_models_different_keys(self, messages):
         """Different models should have different cache keys."""
         cache = LRUCache(max_size=10, ttl_seconds=60)
 
-        class MockMessage:
-            def __init__(self, user, text):
-                self.user = user
-                self.text = text
-
-        messages = [MockMessage("user1", "hello")]
         cache.set(messages, "gpt-4", "response-gpt4")
         cache.set(messages, "gpt-3.5", "response-gpt35")
 
         assert cache.get(messages, "gpt-4") == "response-gpt4"
         assert cache.get(messages, "gpt-3.5") == "response-gpt35"
 
-    def test_ttl_expiration(self):
+    def test_ttl_expiration(self, messages, clock):
         """Expired entries should be evicted."""
-        cache = LRUCache(max_size=10, ttl_seconds=0)  # Immediate expiration
-
-        class MockMessage:
-            def __init__(self, user, text):
-                self.user = user
-                self.text = text
+        cache = LRUCache(max_size=10, ttl_seconds=60)
 
-        messages = [MockMessage("user", "test")]
         cache.set(messages, "model", "value")
+        assert cache.get(messages, "model") == "value"
 
-        # Sleep a tiny bit to ensure expiration
-        time.sleep(0.01)
+        clock.advance(61)
 
         result = cache.get(messages, "model")
         assert result is None
@@ -82,11 +105,6 @@ class TestLRUCache:
         """LRU eviction should remove oldest entry when full."""
         cache = LRUCache(max_size=2, ttl_seconds=60)
 
-        class MockMessage:
-            def __init__(self, user, text):
-                self.user = user
-                self.text = text
-
         # Add 3 entries to a cache with max_size=2
         cache.set([MockMessage("a", "1")], "m", "v1")
         cache.set([MockMessage("b", "2")], "m", "v2")
@@ -101,11 +119,6 @@ class TestLRUCache:
         """Clear should empty the cache."""
         cache = LRUCache(max_size=10, ttl_seconds=60)
 
-        class MockMessage:
-            def __init__(self, user, text):
-                self.user = user
-                self.text = text
-
         cache.set([MockMessage("u", "t")], "m", "v")
         cache.clear()
         assert cache.stats["size"] == 0
@@ -121,3 +134,71 @@ class TestLRUCache:
         assert "max_size" in stats
         assert "ttl_seconds" in stats
         assert "hit_rate" in stats
+
+    def test_thread_safe_concurrent_access(self):
+        """A thread_safe cache should stay consistent under concurrent writers."""
+        cache = LRUCache(max_size=50, ttl_seconds=60, thread_safe=True)
+
+        def worker(n):
+            for i in range(200):
+                cache.set([MockMessage("u", f"{n}-{i}")], "m", i)
+                cache.get([MockMessage("u", f"{n}-{i}")], "m")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert cache.stats["size"] == 50
+
+
+class TestSemanticCache:
+    """Tests for SemanticCache class."""
+
+    @pytest.fixture(autouse=True)
+    def _numpy(self):
+        pytest.importorskip("numpy")
+
+    def test_near_duplicate_hit(self):
+        """Embeddings within max_distance reuse the stored value."""
+        cache = SemanticCache(max_size=4, max_distance=0.05)
+        cache.set([1.0, 0.0, 0.0], "docs")
+        assert cache.get([0.99, 0.05, 0.0]) == "docs"
+        assert cache.get([0.0, 1.0, 0.0]) is None
+        assert cache.stats["hits"] == 1
+        assert cache.stats["misses"] == 1
+
+    def test_namespaces_are_separate(self):
+        """A hit requires the same namespace (e.g. same filters)."""
+        cache = SemanticCache(max_size=4)
+        cache.set([1.0, 0.0], "all", namespace=None)
+        assert cache.get([1.0, 0.0], namespace=("Súmula",)) is None
+
+    def test_ttl_and_lru_eviction(self, clock):
+        """Expired entries miss; a full namespace evicts the least recently used."""
+        cache = SemanticCache(max_size=2, ttl_seconds=1)
+        cache.set([1.0, 0.0, 0.0], "a")
+        cache.set([0.0, 1.0, 0.0], "b")
+        assert cache.get([1.0, 0.0, 0.0]) == "a"
+        cache.set([0.0, 0.0, 1.0], "c")  # evicts "b"
+        assert cache.get([0.0, 1.0, 0.0]) is None
+        assert cache.get([0.0, 0.0, 1.0]) == "c"
+
+        clock.advance(1.1)
+        assert cache.get([1.0, 0.0, 0.0]) is None
+
+    def test_guard_must_match(self):
+        """Same embedding but a different guard (e.g. the query's numbers) misses."""
+        cache = SemanticCache(max_size=4)
+        cache.set([1.0, 0.0], "súmula 473", guard=("473",))
+        cache.set([1.0, 0.0], "súmula 474", guard=("474",))
+        assert cache.get([1.0, 0.0], guard=("474",)) == "súmula 474"
+        assert cache.get([1.0, 0.0], guard=("473",)) == "súmula 473"
+        assert cache.get([1.0, 0.0], guard=("475",)) is None
+
+    def test_disabled_with_zero_size(self):
+        """max_size=0 turns the cache off."""
+        cache = SemanticCache(max_size=0)
+        cache.set([1.0], "x")
+        assert cache.get([1.0]) is None
@@ -0,0 +1,90 @@
+"""Tests for thread history loading in src/cogs/chat."""
+
+from types import SimpleNamespace
+
+import discord
+import pytest
+from src.base import Message
+from src.cogs.chat import ChatCog
+
+
+class FakeLogWriter:
+    async def flush_thread(self, thread_id):
+        pass
+
+
+class FakeDB:
+    """Returns the given rows for FakeThread, like DatabaseService.get_messages."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def get_messages(self, thread_id, limit=10):
+        assert thread_id == FakeThread.id
+        return self.rows[-limit:]
+
+
+class FakeThread:
+    """Thread whose Discord history is `messages`, newest first like thread.history()."""
+
+    id = 42
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def history(self, limit):
+        for msg in self.messages[:limit]:
+            yield msg
+
+
+def discord_msg(author, content):
+    return SimpleNamespace(
+        type=discord.MessageType.default, author=SimpleNamespace(name=author), content=content
+    )
+
+
+def make_cog(rows):
+    bot = SimpleNamespace(bot_name="Sherlock")
+    return ChatCog(bot, FakeDB(rows), log_writer=FakeLogWriter())
+
+
+class TestLoadThreadHistory:
+    async def test_tracked_thread_reads_db(self):
+        """Logged replies come back attributed to the bot; Discord is not paged."""
+        cog = make_cog(
+            [
+                Message(user="ana", text="oi"),
+                Message(user="assistant", text="Olá!"),
+                Message(user="ana", text="e agora?"),
+            ]
+        )
+        thread = FakeThread([])
+        thread.history = None  # would fail if called
+
+        history = await cog._load_thread_history(thread)
+
+        assert history == [
+            Message(user="ana", text="oi"),
+            Message(user="Sherlock", text="Olá!"),
+            Message(user="ana", text="e agora?"),
+        ]
+
+    @pytest.mark.parametrize("rows", [[], [Message(user="ana", text="e agora?")]])
+    async def test_legacy_thread_falls_back_to_discord(self, rows):
+        """A thread whose DB log holds at most the current message is read from Discord."""
+        cog = make_cog(rows)
+        thread = FakeThread(
+            [
+                discord_msg("ana", "e agora?"),
+                discord_msg("Sherlock", "Olá!"),
+                discord_msg("ana", "oi"),
+            ]
+        )
+
+        history = await cog._load_thread_history(thread)
+
+        assert history == [
+            Message(user="ana", text="oi"),
+            Message(user="Sherlock", text="Olá!"),
+            Message(user="ana", text="e agora?"),
+        ]
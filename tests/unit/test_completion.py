@@ -0,0 +1,167 @@
+"""Tests for StreamingReply and example renaming in the completion module."""
+
+from types import SimpleNamespace
+
+import discord
+import pytest
+from src.base import Conversation, Message
+from src.completion import StreamingReply, examples_with_bot_name
+from src.constants import BOT_NAME, MAX_CHARS_PER_REPLY_MSG, STREAM_EDIT_INTERVAL
+
+
+class FakeClock:
+    """Stands in for the time module in src.completion."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeMessage:
+    """Sent Discord message: records its content and every edit."""
+
+    def __init__(self, content, fail_edits=False):
+        self.content = content
+        self.edits = []
+        self.fail_edits = fail_edits
+
+    async def edit(self, content):
+        if self.fail_edits:
+            raise _http_error()
+        self.edits.append(content)
+        self.content = content
+
+
+def _http_error():
+    return discord.HTTPException(SimpleNamespace(status=500, reason="Server Error"), "boom")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr("src.completion.time", fake)
+    return fake
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def send(sent):
+    async def send(content):
+        message = FakeMessage(content)
+        sent.append(message)
+        return message
+
+    return send
+
+
+class TestStreamingReply:
+    """Tests for StreamingReply."""
+
+    async def test_updates_are_throttled(self, clock, send, sent):
+        """At most one Discord call per STREAM_EDIT_INTERVAL."""
+        stream = StreamingReply(send)
+        await stream.update("Olá")
+        assert [m.content for m in sent] == ["Olá"]
+
+        clock.advance(STREAM_EDIT_INTERVAL / 2)
+        assert not stream.due
+        await stream.update("Olá, tudo")
+        assert sent[0].edits == []
+
+        clock.advance(STREAM_EDIT_INTERVAL)
+        assert stream.due
+        await stream.update("Olá, tudo bem?")
+        assert sent[0].edits == ["Olá, tudo bem?"]
+        assert len(sent) == 1
+
+    async def test_rolls_over_to_new_message(self, clock, send, sent):
+        """Text past MAX_CHARS_PER_REPLY_MSG goes to a new message; full chunks aren't re-edited."""
+        stream = StreamingReply(send)
+        await stream.update("a" * (MAX_CHARS_PER_REPLY_MSG - 10))
+
+        clock.advance(STREAM_EDIT_INTERVAL)
+        await stream.update("a" * MAX_CHARS_PER_REPLY_MSG + "b" * 5)
+        assert [m.content for m in sent] == ["a" * MAX_CHARS_PER_REPLY_MSG, "b" * 5]
+
+        clock.advance(STREAM_EDIT_INTERVAL)
+        await stream.update("a" * MAX_CHARS_PER_REPLY_MSG + "b" * 10)
+        assert len(sent[0].edits) == 1
+        assert sent[1].edits == ["b" * 10]
+
+    async def test_blank_chunk_stops_new_messages(self, clock, send, sent):
+        """A whitespace-only chunk is never sent, and nothing after it either."""
+        text = "a" * MAX_CHARS_PER_REPLY_MSG + " " * MAX_CHARS_PER_REPLY_MSG + "c"
+        stream = StreamingReply(send)
+        await stream.update(text)
+        assert [m.content for m in sent] == ["a" * MAX_CHARS_PER_REPLY_MSG]
+
+        clock.advance(STREAM_EDIT_INTERVAL)
+        await stream.update(text + "d")
+        assert len(sent) == 1
+        assert sent[0].edits == []
+
+    @pytest.mark.usefixtures("clock")
+    async def test_finish_ignores_throttle(self, send, sent):
+        """finish() always shows the final text and returns the last message."""
+        stream = StreamingReply(send)
+        await stream.update("Resposta")
+        last = await stream.finish("Resposta completa")
+        assert last is sent[-1]
+        assert sent[0].content == "Resposta completa"
+
+    async def test_finish_without_updates_sends(self, send, sent):
+        """On cache hits nothing was streamed: finish() sends the reply."""
+        stream = StreamingReply(send)
+        assert await stream.finish("Do cache") is sent[0]
+        assert sent[0].content == "Do cache"
+
+    @pytest.mark.usefixtures("clock")
+    async def test_stale_before_first_message_aborts(self, send, sent):
+        """A newer message in the thread stops partial updates before anything is sent."""
+        stream = StreamingReply(send, is_stale=lambda: True)
+        await stream.update("Olá")
+        assert stream.aborted and sent == []
+
+    async def test_discord_error_stops_updates_only(self, clock, sent):
+        """A failed edit stops partial updates only; finish() still tries the whole text."""
+
+        async def send(content):
+            message = FakeMessage(content, fail_edits=not sent)
+            sent.append(message)
+            return message
+
+        stream = StreamingReply(send)
+        await stream.update("Olá")
+        clock.advance(STREAM_EDIT_INTERVAL)
+        await stream.update("Olá, tudo bem?")
+        assert stream.aborted
+
+        clock.advance(STREAM_EDIT_INTERVAL)
+        await stream.update("Olá, tudo bem? Sim")
+        assert len(sent) == 1
+
+        # The edit keeps failing: logged, and the message already sent is returned
+        assert await stream.finish("Olá, tudo bem? Sim.") is sent[0]
+
+
+class TestExamplesWithBotName:
+    """Tests for examples_with_bot_name."""
+
+    def test_renames_and_caches_on_content(self):
+        def examples():
+            return [Conversation([Message("alice", "Oi"), Message(BOT_NAME, "Olá!")])]
+
+        renamed = examples_with_bot_name("Sherlock#1", examples())
+        assert [m.user for m in renamed[0].messages] == ["alice", "Sherlock#1"]
+        # A distinct but equal list hits the same entry
+        assert examples_with_bot_name("Sherlock#1", examples()) is renamed
+        assert examples_with_bot_name("Outro", examples()) is not renamed
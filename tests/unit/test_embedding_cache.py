@@ -0,0 +1,123 @@
+"""Tests for embedding_cache module."""
+
+import asyncio
+
+import pytest
+from src.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache:
+    """Tests for EmbeddingCache class."""
+
+    def test_roundtrip_and_stats(self, tmp_path):
+        """Stored vectors come back by index, with hits and misses counted."""
+        cache = EmbeddingCache(str(tmp_path / "emb.sqlite3"))
+        cache.set_many("model-a", ["hello"], [[0.5, -1.25]])
+
+        result = cache.get_many("model-a", ["other", "hello"])
+        assert result == {1: [0.5, -1.25]}
+        assert cache.stats == {"hits": 1, "misses": 1}
+
+    def test_keyed_by_model(self, tmp_path):
+        """The same text under another model is a miss."""
+        cache = EmbeddingCache(str(tmp_path / "emb.sqlite3"))
+        cache.set_many("model-a", ["hello"], [[1.0]])
+        assert cache.get_many("model-b", ["hello"]) == {}
+
+    def test_persists_across_instances(self, tmp_path):
+        """A new instance on the same file sees previous entries."""
+        path = str(tmp_path / "emb.sqlite3")
+        first = EmbeddingCache(path)
+        first.set_many("m", ["a", "b"], [[1.0], [2.0]])
+        first.close()
+
+        assert EmbeddingCache(path).get_many("m", ["b", "a"]) == {0: [2.0], 1: [1.0]}
+
+    @pytest.mark.parametrize("path", [None, ""])
+    def test_disabled(self, path):
+        """Without a path the cache is a no-op."""
+        cache = EmbeddingCache(path)
+        cache.set_many("m", ["a"], [[1.0]])
+        assert not cache.enabled
+        assert cache.get_many("m", ["a"]) == {}
+
+    def test_unwritable_path_disables_cache(self, tmp_path):
+        """Errors opening the database turn the cache off instead of raising."""
+        blocker = tmp_path / "file"
+        blocker.write_text("x")
+        cache = EmbeddingCache(str(blocker / "emb.sqlite3"))
+
+        assert cache.get_many("m", ["a"]) == {}
+        assert not cache.enabled
+
+
+class TestQueryEmbeddingMemo:
+    """Tests for the in-process query embedding memo of EmbeddingService."""
+
+    async def test_repeated_query_embedded_once(self, monkeypatch):
+        """The same query text (modulo newlines) only reaches the API once."""
+        from src.rag_service import EmbeddingService
+
+        service = EmbeddingService()
+        calls = []
+
+        async def fake_get_embeddings(texts):
+            calls.append(texts)
+            return [[float(len(texts[0]))]]
+
+        monkeypatch.setattr(service, "get_embeddings", fake_get_embeddings)
+        monkeypatch.setattr("src.rag_service.embedding_cache", EmbeddingCache(None))
+
+        first = await service.get_embedding("o que é\nlicitação?")
+        second = await service.get_embedding("o que é licitação?")
+        other = await service.get_embedding("outra pergunta")
+
+        assert first == second == [18.0]
+        assert other == [14.0]
+        assert len(calls) == 2
+
+    async def test_concurrent_queries_share_one_call(self, monkeypatch):
+        """Identical queries in flight at the same time wait on a single API call."""
+        from src.rag_service import EmbeddingService
+
+        service = EmbeddingService()
+        calls = []
+
+        async def fake_get_embeddings(texts):
+            calls.append(texts)
+            await asyncio.sleep(0.01)
+            return [[1.0] for _ in texts]
+
+        monkeypatch.setattr(service, "get_embeddings", fake_get_embeddings)
+        monkeypatch.setattr("src.rag_service.embedding_cache", EmbeddingCache(None))
+
+        results = await asyncio.gather(
+            service.get_embedding("lei 14133"),
+            service.get_embedding("lei 14133"),
+            service.get_embedding("lei\n14133"),
+        )
+
+        assert results == [[1.0]] * 3
+        assert calls == [["lei 14133"]]
+        assert service._in_flight == {}
+
+    async def test_query_uses_persistent_cache(self, tmp_path, monkeypatch):
+        """A fresh service (e.g. after a restart) reads the query vector from disk."""
+        from src.rag_service import EmbeddingService
+
+        cache = EmbeddingCache(str(tmp_path / "emb.sqlite3"))
+        monkeypatch.setattr("src.rag_service.embedding_cache", cache)
+
+        async def fake_get_embeddings(texts):
+            return [[0.5] for _ in texts]
+
+        async def unreachable(texts):
+            raise AssertionError("should have been served from the cache")
+
+        first = EmbeddingService()
+        monkeypatch.setattr(first, "get_embeddings", fake_get_embeddings)
+        assert await first.get_embedding("súmula 473") == [0.5]
+
+        restarted = EmbeddingService()
+        monkeypatch.setattr(restarted, "get_embeddings", unreachable)
+        assert await restarted.get_embedding("súmula 473") == [0.5]
@@ -0,0 +1,180 @@
+"""Tests for RecursiveTokenSplitter and run_pipeline in scripts/ingest_docs."""
+
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from scripts import ingest_docs
+from scripts.ingest_docs import RecursiveTokenSplitter, run_pipeline
+
+# No word ends in ".": sentence ends are the only "." separators
+WORDS = [
+    "lei",
+    "licitação",
+    "contrato",
+    "artigo",
+    "parágrafo",
+    "único",
+    "prazo",
+    "dias",
+    "órgão",
+    "público",
+    "14133",
+    "§",
+    "inciso",
+    "the",
+    "contract",
+    "term",
+    "shall",
+    "apply",
+]
+
+
+def _make_splitter(chunk_size, chunk_overlap):
+    try:
+        return RecursiveTokenSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    except Exception as e:  # The BPE tables are downloaded on first use
+        pytest.skip(f"tiktoken encoding unavailable: {e}")
+
+
+@pytest.fixture(scope="module")
+def splitter():
+    return _make_splitter(64, 16)
+
+
+@pytest.fixture(scope="module")
+def splitter_no_overlap():
+    return _make_splitter(64, 0)
+
+
+@pytest.fixture(scope="module")
+def document():
+    """Paragraphs of sentences of varying length, reproducible."""
+    rnd = random.Random(0)
+    paragraphs = []
+    for _ in range(80):
+        sentences = [
+            " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(3, 30))) + "."
+            for _ in range(rnd.randint(1, 6))
+        ]
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+
+def _token_count(splitter, text):
+    return len(splitter.tokenizer.encode_ordinary(text))
+
+
+class TestRecursiveTokenSplitter:
+    """Tests for RecursiveTokenSplitter."""
+
+    def test_chunk_size_is_respected(self, splitter, document):
+        chunks = splitter.split_text(document)
+        assert len(chunks) > 1
+        assert all(_token_count(splitter, chunk) <= splitter.chunk_size for chunk in chunks)
+
+    def test_chunks_are_ordered_substrings(self, splitter, document):
+        """Every chunk is a piece of the input, each starting after the previous one."""
+        previous = -1
+        for chunk in splitter.split_text(document):
+            start = document.find(chunk, previous + 1)
+            assert start > previous
+            previous = start
+
+    def test_no_overlap_covers_every_word_once(self, splitter_no_overlap, document):
+        chunks = splitter_no_overlap.split_text(document)
+        assert " ".join(chunks).split() == document.split()
+
+    def test_split_stream_matches_split_text(self, splitter, document, monkeypatch):
+        """Chunks don't depend on how the text arrives, across several stream windows."""
+        monkeypatch.setattr("scripts.ingest_docs._STREAM_WINDOW_CHARS", 2_000)
+        lines = document.split("\n")
+        rnd = random.Random(1)
+        segments, i = [], 0
+        while i < len(lines):
+            step = rnd.randint(1, 8)
+            segments.append("\n".join(lines[i : i + step]))
+            i += step
+
+        expected = splitter.split_text(document)
+        assert len(document) > 5 * 2_000
+        assert list(splitter.split_stream(segments)) == expected
+        assert list(splitter.split_stream(lines)) == expected
+
+    def test_unbreakable_run_is_force_split(self, splitter, splitter_no_overlap):
+        """Text without any separator (e.g. base64) is cut into token windows."""
+        blob = "QUJDREVGR0hJSktMTU5PUFFSU1RVVldYWVo" * 200
+        chunks = splitter_no_overlap.split_text(blob)
+        assert len(chunks) > 1
+        assert "".join(chunks) == blob
+        for s in (splitter, splitter_no_overlap):
+            assert all(_token_count(s, chunk) <= s.chunk_size for chunk in s.split_text(blob))
+
+    def test_overlap_must_be_smaller_than_chunk_size(self):
+        with pytest.raises(ValueError):
+            RecursiveTokenSplitter(chunk_size=10, chunk_overlap=10)
+
+
+class RecordingPool(ProcessPoolExecutor):
+    """Real process pool that records submissions and shutdown, in order."""
+
+    def __init__(self, events, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = events
+
+    def submit(self, *args, **kwargs):
+        self.events.append("submit")
+        return super().submit(*args, **kwargs)
+
+    def shutdown(self, *args, **kwargs):
+        self.events.append("shutdown")
+        super().shutdown(*args, **kwargs)
+
+
+class TestRunPipeline:
+    """Tests for run_pipeline failures and process pool lifetime."""
+
+    @pytest.fixture
+    def events(self, monkeypatch):
+        events = []
+        spawn = multiprocessing.get_context("spawn")
+        monkeypatch.setattr(
+            ingest_docs,
+            "_make_proc_pool",
+            lambda workers: RecordingPool(events, max_workers=workers, mp_context=spawn),
+        )
+        return events
+
+    async def test_bad_pdf_and_empty_file_fail(self, tmp_path, events):
+        """Unreadable and empty files are counted as failures; nothing reaches the RAG."""
+        bad_pdf = tmp_path / "Lei 14133.pdf"
+        bad_pdf.write_bytes(b"not a pdf at all")
+        empty = tmp_path / "vazio.txt"
+        empty.write_text("")
+
+        result = await run_pipeline([bad_pdf, empty], chunk_size=64, overlap=16, workers=1)
+
+        assert result == (0, 2)
+        assert events == ["submit", "submit", "shutdown"]
+
+    async def test_pool_shut_down_after_failure(self, tmp_path, events):
+        """An error while feeding files stops the workers, then shuts the pool down."""
+        empty = tmp_path / "vazio.txt"
+        empty.write_text("")
+
+        def files():
+            yield empty
+            raise OSError("disk went away")
+
+        with pytest.raises(OSError):
+            await run_pipeline(files(), chunk_size=64, overlap=16, workers=1)
+
+        assert events[-1] == "shutdown"
+        assert events.count("shutdown") == 1
+
+    def test_missing_parser_raises_import_error(self, tmp_path, monkeypatch):
+        """A missing library fails the file (ImportError), not the worker (SystemExit)."""
+        monkeypatch.setattr(ingest_docs, "Document", None)
+        with pytest.raises(ImportError):
+            list(ingest_docs.extract_text_from_docx(tmp_path / "lei.docx"))
@@ -0,0 +1,115 @@
+"""Tests for rag_service module."""
+
+import asyncio
+import contextlib
+
+import pytest
+from src.rag_service import RAGService
+
+
+class TestSearchCoalescing:
+    """Tests for in-flight deduplication of RAGService._hybrid_search."""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        service = RAGService()
+        service.calls = []
+
+        async def fake_search(query_text, n_results, filter_metadata, with_content=True):
+            service.calls.append(query_text)
+            await asyncio.sleep(0.01)
+            return [(1, f"doc for {query_text}")]
+
+        monkeypatch.setattr(service, "_run_hybrid_search", fake_search)
+        return service
+
+    async def test_concurrent_identical_searches_share_one_run(self, service):
+        """Same query at the same time hits the backend once; other keys run separately."""
+        results = await asyncio.gather(
+            service._hybrid_search("súmula 473", 5, None),
+            service._hybrid_search("súmula 473", 5, None),
+            service._hybrid_search("súmula 473", 5, {"type": "Súmula"}),
+        )
+
+        assert results[0] == results[1] == [(1, "doc for súmula 473")]
+        assert service.calls == ["súmula 473", "súmula 473"]
+        assert service._in_flight == {}
+
+    async def test_cancelled_waiter_does_not_cancel_others(self, service):
+        """Cancelling one caller (stale prefetch) leaves the shared search running."""
+        first = asyncio.create_task(service._hybrid_search("lei 8666", 5, None))
+        second = asyncio.create_task(service._hybrid_search("lei 8666", 5, None))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == [(1, "doc for lei 8666")]
+        assert first.cancelled()
+        assert service.calls == ["lei 8666"]
+
+
+class TestFilterNormalization:
+    """Metadata filters reach the SQL in the JSON type ingestion stores."""
+
+    async def test_values_take_the_stored_type(self, monkeypatch):
+        """Containment is type-sensitive: "1993" must become 1993, 14133 must become "14133"."""
+        service = RAGService()
+        filters = []
+
+        async def fake_search(query_text, n_results, filter_metadata, with_content=True):
+            filters.append(filter_metadata)
+            return []
+
+        monkeypatch.setattr(service, "_run_hybrid_search", fake_search)
+        await service._hybrid_search("lei", 5, {"year": "1993", "number": 14133, "type": "Lei"})
+        await service._hybrid_search("lei", 5, {"year": 1993, "chunk_index": "2"})
+
+        assert filters == [
+            {"year": 1993, "number": "14133", "type": "Lei"},
+            {"year": 1993, "chunk_index": 2},
+        ]
+
+
+class TestQueryCache:
+    """Tests for the semantic query cache in RAGService._run_hybrid_search."""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        pytest.importorskip("numpy")
+        service = RAGService()
+        service.fetched = []
+
+        async def same_embedding(query_text):
+            # Worst case: the embedding model can't tell the queries apart at all
+            return [1.0, 0.0, 0.0]
+
+        class Conn:
+            async def fetch(self, _sql, _embedding, query_text, *_args):
+                service.fetched.append(query_text)
+                return [{"id": len(service.fetched), "content": f"doc for {query_text}"}]
+
+        class Pool:
+            @contextlib.asynccontextmanager
+            async def acquire(self):
+                yield Conn()
+
+        class DB:
+            pool = Pool()
+
+            async def connect(self):
+                pass
+
+        monkeypatch.setattr(service.embedding_service, "get_embedding", same_embedding)
+        monkeypatch.setattr("src.rag_service.db_service", DB())
+        return service
+
+    async def test_queries_differing_only_in_numbers_do_not_collide(self, service):
+        """Súmula 473 and Súmula 474 never share a cached result."""
+        first = await service._run_hybrid_search("O que diz a Súmula 473?", 5, None)
+        second = await service._run_hybrid_search("O que diz a Súmula 474?", 5, None)
+        again = await service._run_hybrid_search("o que diz a súmula 473", 5, None)
+
+        assert first == [(1, "doc for O que diz a Súmula 473?")]
+        assert second == [(2, "doc for O que diz a Súmula 474?")]
+        # Same numbers and near-identical embedding: served from the cache
+        assert again == first
+        assert service.fetched == ["O que diz a Súmula 473?", "O que diz a Súmula 474?"]
@@ -1,6 +1,6 @@
 """Tests for utility functions."""
 
-from src.utils import split_into_shorter_messages
+from src.utils import mention_thread_id, split_into_shorter_messages
 
 
 class TestSplitIntoShorterMessages:
@@ -28,6 +28,22 @@ class TestSplitIntoShorterMessages:
         assert len(result) == 0
 
 
+class TestMentionThreadId:
+    """Tests for mention_thread_id function."""
+
+    def test_deterministic_and_bigint_range(self):
+        """Same IDs give the same key, always a non-negative BIGINT."""
+        channel_id, user_id = 1234567890123456789, 987654321098765432
+        thread_id = mention_thread_id(channel_id, user_id)
+        assert thread_id == mention_thread_id(channel_id, user_id)
+        assert 0 <= thread_id < 2**63
+
+    def test_distinct_per_user_and_channel(self):
+        """Different users or channels get separate histories."""
+        assert mention_thread_id(1, 2) != mention_thread_id(1, 3)
+        assert mention_thread_id(1, 2) != mention_thread_id(2, 1)
+
+
 class TestIsLastMessageStale:
     """Tests for is_last_message_stale function."""
 